@@ -1,5 +1,5 @@
 from .huffman import HuffmanEncoder, HuffmanDecoder
-from .lz77 import LZ77Compressor, LZ77Decompressor
+from .lz77 import LZ77Compressor, LZ77Decompressor, LZ77Tokens
 from .bwt import BWT
 from .mtf import MTF
 from .rle import RLE
@@ -9,6 +9,7 @@ __all__ = [
     "HuffmanDecoder",
     "LZ77Compressor",
     "LZ77Decompressor",
+    "LZ77Tokens",
     "BWT",
     "MTF",
     "RLE",
@@ -1,3 +1,8 @@
+import sys
+from array import array
+from collections import Counter
+
+
 class BWT:
 
     @staticmethod
@@ -6,22 +11,56 @@ class BWT:
         if len(data) == 0:
             return b"", 0
 
+        data = bytes(data)
+        order = BWT._sort_rotations(data)
+        last_column = data[-1:] + data[:-1]
+        result = bytes(map(last_column.__getitem__, order))
+        orig_idx = order.index(0)
+        return result, orig_idx
+
+    @staticmethod
+    def _sort_rotations(data: bytes) -> list:
+        # префиксное удвоение по циклическим сдвигам: ранги длины 2k собираются
+        # из пары рангов длины k, так что память линейна, а раундов не больше log n
         n = len(data)
-        rotations = []
+        key, k = BWT._initial_keys(data)
 
-        for i in range(n):
-            rotations.append(data[i:] + data[:i])
+        while True:
+            distinct = sorted(set(key))
+            classes = len(distinct)
+            rank = list(map(dict(zip(distinct, range(classes))).__getitem__, key))
 
-        sorted_rot = sorted(enumerate(rotations), key=lambda x: x[1])
-        result = bytearray()
-        orig_idx = 0
+            if classes == n or k >= n:
+                break
 
-        for i, (orig_i, rotation) in enumerate(sorted_rot):
-            result.append(rotation[-1])
-            if orig_i == 0:
-                orig_idx = i
+            second = rank[k:] + rank[:k]
+            key = [first * classes + nxt for first, nxt in zip(rank, second)]
+            k <<= 1
 
-        return bytes(result), orig_idx
+        return sorted(range(n), key=rank.__getitem__)
+
+    @staticmethod
+    def _initial_keys(data: bytes):
+        # первый раунд сразу по 8 байтам: читаем big-endian слова через array,
+        # это экономит три раунда удвоения
+        n = len(data)
+
+        if n < 8:
+            return list(data), 1
+
+        ext = data + data[:8]
+        keys = [0] * n
+
+        for offset in range(8):
+            count = (n - offset + 7) // 8
+            words = array("Q", ext[offset : offset + 8 * count])
+
+            if sys.byteorder == "little":
+                words.byteswap()
+
+            keys[offset::8] = words.tolist()
+
+        return keys, 8
 
     @staticmethod
     def inverse_transform(bwt_data, orig_idx: int) -> bytes:
@@ -29,20 +68,34 @@ class BWT:
         if not bwt_data:
             return b""
 
+        bwt_data = bytes(bwt_data)
         n = len(bwt_data)
-        table = [(bwt_data[i], i) for i in range(n)]
-        sorted_table = sorted(table)
-        next_i = [0] * n
+        counts = [0] * 256
+
+        for byte, count in Counter(bwt_data).items():
+            counts[byte] = count
+
+        starts = [0] * 256
+        total = 0
+
+        for byte in range(256):
+            starts[byte] = total
+            total += counts[byte]
+
+        # lf[j] - позиция в последнем столбце символа, стоящего j-м в первом;
+        # сортировка подсчётом стабильна, поэтому порядок одинаковых байтов сохраняется
+        lf = array("I", bytes(4 * n))
 
-        for i in range(n):
-            next_i[i] = sorted_table[i][1]
+        for i, byte in enumerate(bwt_data):
+            lf[starts[byte]] = i
+            starts[byte] += 1
 
-        result = bytearray()
+        result = bytearray(n)
         curr = orig_idx
 
-        for _ in range(n):
-            result.append(sorted_table[curr][0])
-            curr = next_i[curr]
+        for j in range(n):
+            curr = lf[curr]
+            result[j] = bwt_data[curr]
 
         return bytes(result)
 
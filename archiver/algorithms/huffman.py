@@ -1,66 +1,60 @@
 from typing import Dict, Tuple, Optional
 from collections import Counter
 import heapq
-import pickle
+import struct
+import sys
+from array import array
 
-
-class HuffmanNode:
-
-    def __init__(self, char: Optional[int] = None, freq=0, left=None, right=None):
-        self.char = char
-        self.freq = freq
-        self.left = left
-        self.right = right
-
-    def __lt__(self, other):
-        return self.freq < other.freq
-
-    def is_leaf(self) -> bool:
-        return self.left is None and self.right is None
+_SIZE = struct.Struct(">I")
 
 
 class HuffmanEncoder:
 
+    FLUSH_BYTES = 64
+    # длины кодов хранятся в заголовке полубайтами, поэтому не больше 15
+    MAX_CODE_LEN = 15
+
     def __init__(self):
-        self.root: Optional[HuffmanNode] = None
+        self.lengths: dict = {}
         self.codes: dict = {}
         self.reverse_codes: dict = {}
 
     def build_frequency_table(self, data):
         return dict(Counter(data))
 
-    def build_huffman_tree(self, freq) -> HuffmanNode:
+    def build_code_lengths(
+        self, freq, max_len: Optional[int] = None
+    ) -> Dict[int, int]:
+        # package-merge: оптимальные длины кодов при ограничении max_len;
+        # порядок (частота, символ) делает результат детерминированным
+        max_len = max_len or self.MAX_CODE_LEN
 
         if not freq:
-            return HuffmanNode()
+            return {}
 
-        heap = [HuffmanNode(char=char, freq=freq) for char, freq in freq.items()]
-        heapq.heapify(heap)
+        leaves = [(count, (char,)) for char, count in sorted(freq.items(), key=_by_freq)]
 
-        if len(heap) == 1:
-            node = heapq.heappop(heap)
-            return HuffmanNode(freq=node.freq, left=node)
+        if len(leaves) == 1:
+            return {leaves[0][1][0]: 1}
 
-        while len(heap) > 1:
-            left = heapq.heappop(heap)
-            right = heapq.heappop(heap)
-            merged = HuffmanNode(freq=left.freq + right.freq, left=left, right=right)
-            heapq.heappush(heap, merged)
+        if len(leaves) > 1 << max_len:
+            raise ValueError(f"Слишком много символов для длины кода {max_len}")
 
-        return heap[0]
+        items = leaves
 
-    def generate_codes(self, node: HuffmanNode, code=""):
+        for _ in range(max_len - 1):
+            packages = [
+                (items[i][0] + items[i + 1][0], items[i][1] + items[i + 1][1])
+                for i in range(0, len(items) - 1, 2)
+            ]
+            items = list(heapq.merge(leaves, packages, key=_by_weight))
 
-        if node is None:
-            return
+        lengths = Counter()
 
-        if node.is_leaf():
-            self.codes[node.char] = code if code else "0"
-            self.reverse_codes[code if code else "0"] = node.char
-            return
+        for _, chars in items[: 2 * len(leaves) - 2]:
+            lengths.update(chars)
 
-        self.generate_codes(node.left, code + "0")
-        self.generate_codes(node.right, code + "1")
+        return dict(lengths)
 
     def encode(self, data) -> Tuple[bytearray, Dict]:
 
@@ -68,88 +62,269 @@ class HuffmanEncoder:
             return bytearray(), {}
 
         freq = self.build_frequency_table(data)
-        self.root = self.build_huffman_tree(freq)
-        self.codes = {}
-        self.reverse_codes = {}
-        self.generate_codes(self.root)
-        bits = "".join(self.codes[byte] for byte in data)
-        padding = (8 - len(bits) % 8) % 8
-        bits += "0" * padding
-        result = bytearray()
-
-        for i in range(0, len(bits), 8):
-            byte = bits[i : i + 8]
-            result.append(int(byte, 2))
+        self.lengths = self.build_code_lengths(freq)
+        self.codes = canonical_codes(self.lengths)
+        self.reverse_codes = {code: char for char, code in self.codes.items()}
+        total_bits = sum(count * self.lengths[char] for char, count in freq.items())
+        padding = (8 - total_bits % 8) % 8
+        result = self.pack_bits(data, self.codes, total_bits)
 
         meta = {
-            "freq": freq,
+            "lengths": self.lengths,
             "padding": padding,
             "orig_size": len(data),
         }
         return result, meta
 
+    @classmethod
+    def pack_bits(
+        cls, data, codes: Dict[int, Tuple[int, int]], total_bits: int
+    ) -> bytearray:
+        # коды копятся в целом аккумуляторе и сбрасываются целыми блоками
+        # по FLUSH_BYTES в заранее выделенный буфер точного размера
+        code_of = [0] * 256
+        len_of = [0] * 256
+
+        for char, (code, length) in codes.items():
+            code_of[char] = code
+            len_of[char] = length
+
+        result = bytearray((total_bits + 7) // 8)
+        flush_bytes = cls.FLUSH_BYTES
+        flush_bits = flush_bytes * 8
+        pos = 0
+        acc = 0
+        nbits = 0
+
+        for byte in data:
+            length = len_of[byte]
+            acc = (acc << length) | code_of[byte]
+            nbits += length
+
+            if nbits >= flush_bits:
+                nbits -= flush_bits
+                word = (acc >> nbits).to_bytes(flush_bytes, "big")
+                result[pos : pos + flush_bytes] = word
+                pos += flush_bytes
+                acc &= (1 << nbits) - 1
+
+        if nbits:
+            tail = (nbits + 7) // 8
+            result[pos : pos + tail] = (acc << (tail * 8 - nbits)).to_bytes(tail, "big")
+
+        return result
+
 
 class HuffmanDecoder:
 
-    def __init__(self):
-        self.root: Optional[HuffmanNode] = None
+    TABLE_BITS = 12
+
+    @staticmethod
+    def build_decode_table(codes: Dict[int, Tuple[int, int]], table_bits: int) -> list:
+        # для каждого значения из table_bits бит храним все символы, целиком
+        # уместившиеся в эти биты, и число потраченных бит (0 - длинный код)
+        mask = (1 << table_bits) - 1
+        size = 1 << table_bits
+        first_char = [0] * size
+        first_len = [0] * size
+
+        for char, (code, length) in codes.items():
+
+            if length > table_bits:
+                continue
+
+            start = code << (table_bits - length)
+
+            for idx in range(start, start + (1 << (table_bits - length))):
+                first_char[idx] = char
+                first_len[idx] = length
+
+        table = []
 
-    def build_tree_from_freq(self, freq) -> HuffmanNode:
-        encoder = HuffmanEncoder()
-        return encoder.build_huffman_tree(freq)
+        for idx in range(size):
+            chars = bytearray()
+            used = 0
+
+            while True:
+                sub = (idx << used) & mask
+                length = first_len[sub]
+
+                if length == 0 or used + length > table_bits:
+                    break
+
+                chars.append(first_char[sub])
+                used += length
+
+            table.append((bytes(chars), used))
+
+        return table
 
     def decode(self, enc_data, meta: Dict) -> bytearray:
 
         if not enc_data or not meta:
             return bytearray()
 
-        freq = meta["freq"]
-        padding = meta["padding"]
-        orig_size = meta["orig_size"]
-        self.root = self.build_tree_from_freq(freq)
-        bits = "".join(format(byte, "08b") for byte in enc_data)
+        codes = canonical_codes(meta["lengths"])
+        return self.decode_with_codes(enc_data, codes, meta["orig_size"])
+
+    def decode_with_codes(
+        self, enc_data, codes: Dict[int, Tuple[int, int]], orig_size: int
+    ) -> bytearray:
+        table_bits = max(1, min(self.TABLE_BITS, (len(enc_data) * 8).bit_length()))
+        table = self.build_decode_table(codes, table_bits)
+        long_codes = {
+            (code, length): char
+            for char, (code, length) in codes.items()
+            if length > table_bits
+        }
+        max_len = max(length for _, length in codes.values())
 
-        if padding > 0:
-            bits = bits[:-padding]
+        # биты читаются из целого аккумулятора 32-битными словами; хвост добит
+        # нулями, чтобы дочитывание за концом потока не требовало проверок
+        data = bytes(enc_data) + bytes(-len(enc_data) % 4 + 4 * (max_len // 32 + 2))
+        words = array("I", data)
+
+        if sys.byteorder == "little":
+            words.byteswap()
 
         dec = bytearray()
-        node = self.root
+        mask = (1 << table_bits) - 1
+        acc = 0
+        nbits = 0
+        w = 0
 
-        for bit in bits:
+        while len(dec) < orig_size:
 
-            if node.is_leaf():
-                dec.append(node.char)
+            if nbits < table_bits:
+                acc = ((acc & ((1 << nbits) - 1)) << 32) | words[w]
+                w += 1
+                nbits += 32
 
-                if len(dec) >= orig_size:
-                    break
+            idx = (acc >> (nbits - table_bits)) & mask
+            chars, used = table[idx]
 
+            if used:
+                dec += chars
+                nbits -= used
                 continue
 
-            if bit == "0":
-                node = node.left
+            length = table_bits
+            code = idx
 
-            else:
-                node = node.right
+            while (code, length) not in long_codes:
+                length += 1
 
-            if node.is_leaf():
-                dec.append(node.char)
-                node = self.root
+                if length > max_len:
+                    raise ValueError("Повреждённые данные Huffman")
 
-                if len(dec) >= orig_size:
-                    break
+                if nbits < length:
+                    acc = ((acc & ((1 << nbits) - 1)) << 32) | words[w]
+                    w += 1
+                    nbits += 32
 
+                code = (acc >> (nbits - length)) & ((1 << length) - 1)
+
+            dec.append(long_codes[(code, length)])
+            nbits -= length
+
+        del dec[orig_size:]
         return dec
 
 
+def _by_freq(item):
+    char, count = item
+    return count, char
+
+
+def _by_weight(item):
+    return item[0]
+
+
+def canonical_codes(lengths: Dict[int, int]) -> Dict[int, Tuple[int, int]]:
+    # канонический код однозначно восстанавливается по одним длинам:
+    # символы упорядочены по (длина, символ), коды идут подряд
+    codes = {}
+    code = 0
+    prev_len = 0
+
+    for char, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - prev_len
+        codes[char] = (code, length)
+        code += 1
+        prev_len = length
+
+    return codes
+
+
+def pack_code_lengths(lengths: Dict[int, int]) -> bytes:
+    # 32 байта битовой карты присутствующих символов + длины по полубайту
+    bitmap = bytearray(32)
+    nibbles = []
+
+    for char in sorted(lengths):
+        bitmap[char >> 3] |= 0x80 >> (char & 7)
+        nibbles.append(lengths[char])
+
+    if len(nibbles) % 2:
+        nibbles.append(0)
+
+    packed = bytes(
+        (nibbles[i] << 4) | nibbles[i + 1] for i in range(0, len(nibbles), 2)
+    )
+    return bytes(bitmap) + packed
+
+
+def unpack_code_lengths(data, offset: int = 0) -> Tuple[Dict[int, int], int]:
+    bitmap = data[offset : offset + 32]
+
+    if len(bitmap) < 32:
+        raise ValueError("Обрезанный заголовок Huffman")
+
+    chars = [char for char in range(256) if bitmap[char >> 3] & (0x80 >> (char & 7))]
+    offset += 32
+    packed = data[offset : offset + (len(chars) + 1) // 2]
+
+    if len(packed) < (len(chars) + 1) // 2:
+        raise ValueError("Обрезанный заголовок Huffman")
+
+    lengths = {}
+
+    for i, char in enumerate(chars):
+        byte = packed[i >> 1]
+        lengths[char] = byte >> 4 if i % 2 == 0 else byte & 0x0F
+
+    return lengths, offset + len(packed)
+
+
 def compress_with_huffman(data):
     encoder = HuffmanEncoder()
     enc_data, meta = encoder.encode(data)
-    package = {"data": bytes(enc_data), "meta": meta}
-    return pickle.dumps(package)
+
+    if not meta:
+        return _SIZE.pack(0)
+
+    header = _SIZE.pack(meta["orig_size"]) + pack_code_lengths(meta["lengths"])
+    return header + bytes(enc_data)
 
 
 def decompress_with_huffman(data):
-    package = pickle.loads(data)
+    if len(data) < _SIZE.size:
+        raise ValueError("Обрезанный заголовок Huffman")
+
+    (orig_size,) = _SIZE.unpack_from(data, 0)
+
+    if orig_size == 0:
+        return b""
+
+    lengths, offset = unpack_code_lengths(data, _SIZE.size)
     decoder = HuffmanDecoder()
-    dec = decoder.decode(package["data"], package["meta"])
+
+    try:
+        dec = decoder.decode_with_codes(
+            data[offset:], canonical_codes(lengths), orig_size
+        )
+    except IndexError:
+        # поток кодов кончился раньше orig_size символов
+        raise ValueError("Обрезанные данные Huffman") from None
+
     return bytes(dec)
@@ -1,118 +1,548 @@
+from array import array
+
+
 class LZ77Compressor:
 
-    def __init__(self, wnd_size=32768, lookahead=258):
+    HASH_BITS = 15
+    HASH_SHIFT = 5
+
+    # уровень: (стратегия, max_chain, nice_len, lazy)
+    # greedy - берём первое лучшее совпадение, lazy здесь - длина матча, после
+    # которой позиции внутри него не добавляются в хеш; lazy - откладываем матч,
+    # если в следующей позиции есть длиннее (пока текущий короче lazy);
+    # optimal - динамика по оценке цены токенов в битах
+    LEVELS = {
+        1: ("greedy", 4, 8, 4),
+        2: ("greedy", 8, 16, 8),
+        3: ("greedy", 32, 32, 32),
+        4: ("lazy", 16, 32, 8),
+        5: ("lazy", 32, 64, 16),
+        6: ("lazy", 128, 128, 32),
+        7: ("lazy", 256, 258, 258),
+        8: ("optimal", 128, 128, 0),
+        9: ("optimal", 512, 258, 0),
+    }
+
+    LITERAL_PRICE = 9
+    MATCH_PRICE = 10
+
+    def __init__(
+        self, wnd_size=32768, lookahead=258, level=6, max_chain=None, nice_len=None
+    ):
         self.wnd_size = wnd_size
         self.lookahead = lookahead
         self.minlen = 3
-
-    def compress(self, data):
+        self.level = max(1, min(9, level))
+        strategy, chain, nice, lazy = self.LEVELS[self.level]
+        self.strategy = strategy
+        self.max_chain = max_chain or chain  # сколько кандидатов из цепочки проверяем
+        self.nice_len = nice_len or nice  # совпадение такой длины считаем достаточным
+        self.lazy = lazy
+
+    def compress(self, data) -> "LZ77Tokens":
         if len(data) == 0:
-            return []
+            return LZ77Tokens()
+
+        data = bytes(data)
+
+        if self.strategy == "greedy":
+            return self._compress_greedy(data)
+
+        if self.strategy == "lazy":
+            return self._compress_lazy(data)
+
+        return self._compress_optimal(data)
+
+    def _init_tables(self, data):
+        # head[h] - последняя позиция с хешем h, prev[pos & wnd_mask] - предыдущая
+        # позиция с тем же хешем; позиции хранятся со сдвигом +1, 0 - пусто
+        hash_mask = (1 << self.HASH_BITS) - 1
+        wnd_mask = (1 << (self.wnd_size - 1).bit_length()) - 1
+        head = array("I", bytes(4 * (hash_mask + 1)))
+        prev = array("I", bytes(4 * (wnd_mask + 1)))
+        h = self._hash_prefix(data, 0)
+        return head, prev, h
+
+    def _hash_prefix(self, data, i: int) -> int:
+        # хеш первых двух байт; третий добавляется при вставке позиции i
+        if i + 1 >= len(data):
+            return 0
+
+        hash_mask = (1 << self.HASH_BITS) - 1
+        return ((data[i] << self.HASH_SHIFT) ^ data[i + 1]) & hash_mask
+
+    def _compress_greedy(self, data):
+        n = len(data)
+        tokens = LZ77Tokens()
+        literals = tokens.literals
+        head, prev, h = self._init_tables(data)
+        hash_mask = len(head) - 1
+        wnd_mask = len(prev) - 1
+        shift = self.HASH_SHIFT
+        lookahead = self.lookahead
+        wnd_size = self.wnd_size
+        max_insert = self.lazy
+        i = 0
+
+        while i < n:
+            limit = n - i if n - i < lookahead else lookahead
+
+            if limit < self.minlen:
+                literals += data[i:]
+                break
 
-        data = bytearray(data)
-        result = []
-        dictionary = (
-            {}
-        )  # добавлено для того  чтобы оптимизировать поиск по скользящему окну, потому что перебор по всему окну слишком долгий
+            # хеш трёх байт в позиции i считается скользящим образом
+            h = ((h << shift) ^ data[i + 2]) & hash_mask
+            cand = head[h]
+
+            if cand and i - cand < wnd_size:
+                match_len, match_pos = self._longest_match(data, i, limit, cand, prev)
+
+            else:
+                match_len = 0
+
+            prev[i & wnd_mask] = cand
+            head[h] = i + 1
+
+            if match_len < self.minlen:
+                literals.append(data[i])
+                i += 1
+                continue
+
+            tokens.add_match(i - match_pos, match_len)
+            end = i + match_len
+            i += 1
+
+            if match_len > max_insert:
+                # длинный матч не индексируем целиком, только пересчитываем хеш
+                i = end
+                h = self._hash_prefix(data, i)
+                continue
+
+            while i < end:
+
+                if i + 2 < n:
+                    h = ((h << shift) ^ data[i + 2]) & hash_mask
+                    prev[i & wnd_mask] = head[h]
+                    head[h] = i + 1
+
+                i += 1
+
+        return tokens
+
+    def _compress_lazy(self, data):
+        n = len(data)
+        tokens = LZ77Tokens()
+        literals = tokens.literals
+        head, prev, h = self._init_tables(data)
+        hash_mask = len(head) - 1
+        wnd_mask = len(prev) - 1
+        shift = self.HASH_SHIFT
+        lookahead = self.lookahead
+        wnd_size = self.wnd_size
+        minlen = self.minlen
+        max_lazy = self.lazy
+        # матч, найденный в позиции i - 1 и ещё не выданный
+        prev_len = 0
+        prev_offset = 0
+        pending = False
         i = 0
 
-        while i < len(data):
-            if i + self.minlen > len(data):
-                result.extend(data[i:])
+        while i < n:
+            limit = n - i if n - i < lookahead else lookahead
+
+            if limit < minlen:
                 break
 
-            sequence = bytes(data[i : i + self.minlen])
-            match_pos = None
+            h = ((h << shift) ^ data[i + 2]) & hash_mask
+            cand = head[h]
             match_len = 0
 
-            if sequence in dictionary:
-                for pos in dictionary[sequence]:
+            if cand and i - cand < wnd_size and prev_len < max_lazy:
+                match_len, match_pos = self._longest_match(data, i, limit, cand, prev)
 
-                    if i - pos > self.wnd_size:
-                        continue # окно вообще здесь оставленно чтобы смещение не привышало вес самой последовательности 
+            prev[i & wnd_mask] = cand
+            head[h] = i + 1
 
-                    length = self.minlen
-                    max_length = min(self.lookahead, len(data) - i)
+            if prev_len >= minlen and match_len <= prev_len:
+                # в i не нашлось ничего лучше - выдаём отложенный матч из i - 1
+                tokens.add_match(prev_offset, prev_len)
+                end = i - 1 + prev_len
+                i += 1
 
-                    while (
-                        length < max_length and data[i + length] == data[pos + length]
-                    ):
-                        length += 1
+                while i < end:
+
+                    if i + 2 < n:
+                        h = ((h << shift) ^ data[i + 2]) & hash_mask
+                        prev[i & wnd_mask] = head[h]
+                        head[h] = i + 1
+
+                    i += 1
+
+                prev_len = 0
+                pending = False
+                continue
+
+            if pending:
+                literals.append(data[i - 1])
+
+            pending = True
+            prev_len = match_len
+            prev_offset = i - match_pos if match_len else 0
+            i += 1
+
+        if prev_len >= minlen:
+            tokens.add_match(prev_offset, prev_len)
+            i = i - 1 + prev_len
+
+        elif pending:
+            i -= 1
+
+        literals += data[i:]
+        return tokens
+
+    def _compress_optimal(self, data):
+        n = len(data)
+        head, prev, h = self._init_tables(data)
+        hash_mask = len(head) - 1
+        wnd_mask = len(prev) - 1
+        shift = self.HASH_SHIFT
+        lookahead = self.lookahead
+        wnd_size = self.wnd_size
+        minlen = self.minlen
+        nice_len = self.nice_len
+        literal_price = self.LITERAL_PRICE
+        match_price = self.MATCH_PRICE
+        # price[j] - минимальная цена в битах кодирования data[:j],
+        # step_len/step_offset[j] - последний токен на этом пути
+        inf = float("inf")
+        price = [0] + [inf] * n
+        step_len = [0] * (n + 1)
+        step_offset = [0] * (n + 1)
+        i = 0
 
-                    if length > match_len:
-                        match_len = length
-                        match_pos = pos
+        while i < n:
+            base = price[i]
 
-            if match_len >= self.minlen:
-                offset = i - match_pos
-                result.append((offset, match_len))
+            if base + literal_price < price[i + 1]:
+                price[i + 1] = base + literal_price
+                step_len[i + 1] = 1
 
-                for j in range(match_len):
+            limit = n - i if n - i < lookahead else lookahead
 
-                    if i + j + self.minlen <= len(data):
-                        subseq = bytes(data[i + j : i + j + self.minlen])
+            if limit < minlen:
+                i += 1
+                continue
 
-                        if subseq not in dictionary:
-                            dictionary[subseq] = []
-                        dictionary[subseq].append(i + j)
+            h = ((h << shift) ^ data[i + 2]) & hash_mask
+            cand = head[h]
+            matches = ()
 
-                i += match_len
+            if cand and i - cand < wnd_size:
+                matches = self._find_matches(data, i, limit, cand, prev)
 
-            else:
-                result.append(data[i])
+            prev[i & wnd_mask] = cand
+            head[h] = i + 1
+            shorter = minlen - 1
 
-                if sequence not in dictionary:
-                    dictionary[sequence] = []
+            for length, pos in matches:
+                offset = i - pos
+                cost = base + match_price + offset.bit_length()
 
-                dictionary[sequence].append(i)
+                for end in range(i + shorter + 1, i + length + 1):
+
+                    if cost + (end - i).bit_length() < price[end]:
+                        price[end] = cost + (end - i).bit_length()
+                        step_len[end] = end - i
+                        step_offset[end] = offset
+
+                shorter = length
+
+            if shorter >= nice_len:
+                # длинный матч берём сразу, не перебирая позиции внутри него
+                end = i + shorter
                 i += 1
 
-            if i % 1000 == 0: # тут в идеале надо имперически подбирать после какого количества итераций очищать словарь 
-                self._cleanup_dictionary(dictionary, i)
+                while i < end:
 
-        return result
+                    if i + 2 < n:
+                        h = ((h << shift) ^ data[i + 2]) & hash_mask
+                        prev[i & wnd_mask] = head[h]
+                        head[h] = i + 1
+
+                    i += 1
+
+                continue
+
+            i += 1
+
+        # восстанавливаем путь с конца, затем выдаём токены по порядку
+        ends = []
+        j = n
+
+        while j > 0:
+            ends.append(j)
+            j -= step_len[j]
+
+        tokens = LZ77Tokens()
+        literals = tokens.literals
+
+        for end in reversed(ends):
+            length = step_len[end]
+
+            if length == 1:
+                literals.append(data[end - 1])
+
+            else:
+                tokens.add_match(step_offset[end], length)
+
+        return tokens
+
+    def _longest_match(self, data, i: int, limit: int, cand: int, prev) -> tuple:
+        wnd_mask = len(prev) - 1
+        nice_len = self.nice_len if self.nice_len < limit else limit
+        best_len = 0
+        best_pos = 0
+        chain = self.max_chain
+
+        while cand and chain:
+            pos = cand - 1
+
+            if i - pos > self.wnd_size:
+                break
+
+            # сначала дешёвая проверка байта, на котором должен продлиться лучший матч
+            if data[pos + best_len] == data[i + best_len]:
+                length = self._match_length(data, pos, i, limit)
+
+                if length > best_len:
+                    best_len = length
+                    best_pos = pos
+
+                    if length >= nice_len:
+                        break
+
+            cand = prev[pos & wnd_mask]
+            chain -= 1
+
+        return best_len, best_pos
+
+    def _find_matches(self, data, i: int, limit: int, cand: int, prev) -> list:
+        # все улучшения длины вдоль цепочки: (длина, позиция) по возрастанию длины
+        wnd_mask = len(prev) - 1
+        nice_len = self.nice_len if self.nice_len < limit else limit
+        matches = []
+        best_len = self.minlen - 1
+        chain = self.max_chain
 
-    def _cleanup_dictionary(self, dictionary: dict, curr_pos: int):
-        keys_to_remove = []
-        for key, positions in dictionary.items():
-            valid_positions = [
-                pos for pos in positions if curr_pos - pos <= self.wnd_size
-            ]
+        while cand and chain:
+            pos = cand - 1
 
-            if valid_positions:
-                dictionary[key] = valid_positions
+            if i - pos > self.wnd_size:
+                break
+
+            if data[pos + best_len] == data[i + best_len]:
+                length = self._match_length(data, pos, i, limit)
+
+                if length > best_len:
+                    best_len = length
+                    matches.append((length, pos))
+
+                    if length >= nice_len:
+                        break
+
+            cand = prev[pos & wnd_mask]
+            chain -= 1
+
+        return matches
+
+    @staticmethod
+    def _match_length(data, pos: int, i: int, limit: int) -> int:
+        # длина общего префикса сравнением срезов (memcmp): сначала удваиваем
+        # проверяемую длину, затем бинарный поиск в последнем интервале
+        lo = 0
+        hi = 4
+
+        while hi < limit:
+
+            if data[pos : pos + hi] != data[i : i + hi]:
+                break
+
+            lo = hi
+            hi <<= 1
+
+        else:
+
+            if data[pos : pos + limit] == data[i : i + limit]:
+                return limit
+
+            hi = limit
+
+        hi -= 1
+
+        while lo < hi:
+            mid = (lo + hi + 1) >> 1
+
+            if data[pos : pos + mid] == data[i : i + mid]:
+                lo = mid
 
             else:
-                keys_to_remove.append(key)
+                hi = mid - 1
 
-        for key in keys_to_remove:
-            del dictionary[key]
+        return lo
 
 
 class LZ77Decompressor:
     @staticmethod
-    def decompress(data_data: list) -> bytearray:
+    def decompress(tokens: "LZ77Tokens", max_size: int = None) -> bytearray:
+        # max_size - ожидаемый размер блока: повреждённые длины не раздувают
+        # память до проверки crc
         result = bytearray()
+        literals = tokens.literals
+        lengths = tokens.lengths
+        offsets = tokens.offsets
+        min_match = LZ77Tokens.MIN_MATCH
+        limit = float("inf") if max_size is None else max_size
+        lit_pos = 0
+        len_pos = 0
+        off_pos = 0
+
+        try:
+            for _ in range(tokens.match_count):
+                # однобайтовые varint - частый случай, читаем их без вызова функции
+                run = lengths[len_pos]
+
+                if run < 0x80:
+                    len_pos += 1
+
+                else:
+                    run, len_pos = read_varint(lengths, len_pos)
+
+                length = lengths[len_pos]
+
+                if length < 0x80:
+                    len_pos += 1
+
+                else:
+                    length, len_pos = read_varint(lengths, len_pos)
+
+                offset, off_pos = read_varint(offsets, off_pos)
+                length += min_match
 
-        for item in data_data:
+                if run:
+                    result += literals[lit_pos : lit_pos + run]
+                    lit_pos += run
+
+                if not 0 < offset <= len(result) or len(result) + length > limit:
+                    raise ValueError("Повреждённый поток токенов LZ77")
 
-            if isinstance(item, tuple):
-                offset, length = item
                 position = len(result) - offset
 
-                for i in range(length):
-                    result.append(result[position + i])
+                if offset >= length:
+                    result += result[position : position + length]
+                    continue
 
-            else:
-                result.append(item)
+                # перекрывающийся матч повторяет последние offset байт:
+                # размножаем образец
+                pattern = result[position:]
+                result += (pattern * (length // offset + 1))[:length]
 
+        except IndexError:
+            raise ValueError("Повреждённый поток токенов LZ77") from None
+
+        result += literals[lit_pos:]
         return result
 
 
-def compress_lz77(data, wnd_size=32768):
-    compressor = LZ77Compressor(wnd_size=wnd_size)
+class LZ77Tokens:
+    # упакованный поток токенов: все литералы подряд, для каждого матча в lengths
+    # varint длины предшествующей серии литералов и varint (длина - MIN_MATCH),
+    # в offsets - varint смещения; литералы после последнего матча идут хвостом
+
+    MIN_MATCH = 3
+
+    def __init__(self, literals=None, lengths=None, offsets=None, match_count=0):
+        self.literals = bytearray() if literals is None else literals
+        self.lengths = bytearray() if lengths is None else lengths
+        self.offsets = bytearray() if offsets is None else offsets
+        self.match_count = match_count
+        self._lit_mark = len(self.literals)
+
+    def __len__(self) -> int:
+        return len(self.literals) + self.match_count
+
+    def add_match(self, offset: int, length: int):
+        run = len(self.literals) - self._lit_mark
+        self._lit_mark = len(self.literals)
+        write_varint(self.lengths, run)
+        write_varint(self.lengths, length - self.MIN_MATCH)
+        write_varint(self.offsets, offset)
+        self.match_count += 1
+
+    def to_bytes(self) -> bytes:
+        header = bytearray()
+
+        for value in (
+            self.match_count,
+            len(self.literals),
+            len(self.lengths),
+            len(self.offsets),
+        ):
+            write_varint(header, value)
+
+        return bytes(header + self.literals + self.lengths + self.offsets)
+
+    @classmethod
+    def from_bytes(cls, data) -> "LZ77Tokens":
+        data = bytes(data)
+        pos = 0
+        sizes = []
+
+        for _ in range(4):
+            value, pos = read_varint(data, pos)
+            sizes.append(value)
+
+        match_count, lit_size, len_size, off_size = sizes
+
+        if pos + lit_size + len_size + off_size != len(data):
+            raise ValueError("Повреждённый поток токенов LZ77")
+
+        literals = bytearray(data[pos : pos + lit_size])
+        pos += lit_size
+        lengths = bytearray(data[pos : pos + len_size])
+        pos += len_size
+        offsets = bytearray(data[pos : pos + off_size])
+        return cls(literals, lengths, offsets, match_count)
+
+
+def write_varint(buf: bytearray, value: int):
+    # LEB128: по 7 бит на байт, старший бит - признак продолжения
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    buf.append(value)
+
+
+def read_varint(data, pos: int):
+    result = 0
+    shift = 0
+
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return result, pos
+
+        shift += 7
+
+
+def compress_lz77(data, wnd_size=32768, level=6):
+    compressor = LZ77Compressor(wnd_size=wnd_size, level=level)
     return compressor.compress(data)
 
 
-def decompress_lz77(data: list) -> bytes:
-    return bytes(LZ77Decompressor.decompress(data))
+def decompress_lz77(tokens: "LZ77Tokens") -> bytes:
+    return bytes(LZ77Decompressor.decompress(tokens))
@@ -0,0 +1,55 @@
+from .bwt import BWT
+from .huffman import compress_with_huffman, decompress_with_huffman
+from .lz77 import (
+    LZ77Compressor,
+    LZ77Decompressor,
+    LZ77Tokens,
+    read_varint,
+    write_varint,
+)
+from .mtf import MTF
+from .rle import RLE
+
+
+def compress_lzh_block(data, level: int = 6) -> bytes:
+    # LZ77 -> три потока токенов, каждый сжимается своим Huffman
+    tokens = LZ77Compressor(level=level).compress(data)
+    result = bytearray()
+    write_varint(result, tokens.match_count)
+
+    for stream in (tokens.literals, tokens.lengths, tokens.offsets):
+        packed = compress_with_huffman(stream)
+        write_varint(result, len(packed))
+        result += packed
+
+    return bytes(result)
+
+
+def decompress_lzh_block(payload, raw_size: int = None) -> bytes:
+    match_count, pos = read_varint(payload, 0)
+    streams = []
+
+    for _ in range(3):
+        size, pos = read_varint(payload, pos)
+        streams.append(bytearray(decompress_with_huffman(payload[pos : pos + size])))
+        pos += size
+
+    tokens = LZ77Tokens(*streams, match_count=match_count)
+    return bytes(LZ77Decompressor.decompress(tokens, raw_size))
+
+
+def compress_bwh_block(data) -> bytes:
+    # BWT -> MTF -> RLE -> Huffman, как в bzip2
+    bwt_data, bwt_idx = BWT.transform(data)
+    rle_data = RLE.encode_bytes(MTF.encode(bwt_data))
+    result = bytearray()
+    write_varint(result, bwt_idx)
+    result += compress_with_huffman(rle_data)
+    return bytes(result)
+
+
+def decompress_bwh_block(payload) -> bytes:
+    bwt_idx, pos = read_varint(payload, 0)
+    rle_data = decompress_with_huffman(payload[pos:])
+    mtf_data = RLE.decode_bytes(rle_data)
+    return BWT.inverse_transform(bytes(MTF.decode(mtf_data)), bwt_idx)
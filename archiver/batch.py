@@ -0,0 +1,173 @@
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from .factory import ArchiveFactory
+from .utils.parallel import ordered_map
+
+
+class BatchResult(NamedTuple):
+    source: str
+    output: str
+    input_size: int
+    output_size: int
+    elapsed: float
+    # None - успех, иначе текст ошибки (исключения не всегда переносятся
+    # между процессами)
+    error: Optional[str] = None
+
+
+def expand_sources(patterns: Iterable[str], list_file: str = None) -> List[Path]:
+    # шаблоны glob (в том числе "**") и пути из списка, по строке на путь
+    # ("-" - stdin); несуществующие пути остаются и попадут в ошибки
+    names = list(patterns)
+
+    if list_file == "-":
+        names += sys.stdin.read().splitlines()
+
+    elif list_file:
+        with open(list_file, encoding="utf-8") as f:
+            names += f.read().splitlines()
+
+    sources = []
+    seen = set()
+
+    for name in names:
+        name = name.strip()
+
+        if not name:
+            continue
+
+        if any(char in name for char in "*?["):
+            matches = sorted(glob.glob(name, recursive=True))
+        else:
+            matches = [name]
+
+        for match in matches:
+            if match not in seen:
+                seen.add(match)
+                sources.append(Path(match))
+
+    return sources
+
+
+def plan_outputs(sources: List[Path], rename, output_dir=None):
+    # выходной путь rename(source) для каждого исходного; с output_dir
+    # сохраняется структура директорий относительно общего родителя
+    # исходных, чтобы одноимённые файлы из разных директорий не совпали.
+    # Возвращает ([(исходный, выходной)], [BatchResult с ошибкой]) - не
+    # запускаются задачи с уже занятым выходным путём, с выходом поверх
+    # исходного файла пакета и с исходным, который пишет другая задача
+    # (повторный запуск "cm *" по f.log и f.log.zst)
+    outputs = [rename(source) for source in sources]
+
+    if output_dir is not None:
+        root = os.path.commonpath([os.path.abspath(s.parent) for s in sources])
+        outputs = [
+            Path(output_dir) / os.path.relpath(os.path.abspath(output), root)
+            for output in outputs
+        ]
+
+    inputs = {os.path.abspath(source): source for source in sources}
+    producers = {}
+
+    for source, output in zip(sources, outputs):
+        producers.setdefault(os.path.abspath(output), source)
+
+    planned = []
+    conflicts = []
+    owners = {}
+
+    for source, output in zip(sources, outputs):
+        key = os.path.abspath(output)
+        producer = producers.get(os.path.abspath(source))
+
+        if key in inputs:
+            error = f"Выходной файл совпадает с исходным {inputs[key]}"
+        elif producer is not None and producer != source:
+            error = f"Исходный файл совпадает с результатом {producer}"
+        elif key in owners:
+            error = f"Выходной файл совпадает с результатом {owners[key]}"
+        else:
+            owners[key] = source
+            planned.append((source, output))
+            continue
+
+        conflicts.append(BatchResult(str(source), str(output), 0, 0, 0.0, error))
+
+    return planned, conflicts
+
+
+def compress_job(task) -> BatchResult:
+    source, output, level, implementation = task
+    start = time.perf_counter()
+
+    try:
+        compressor = ArchiveFactory.get_compressor(
+            output, level=level, implementation=implementation
+        )
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        compressor.compress(source, output)
+        return BatchResult(
+            str(source),
+            str(output),
+            _path_size(source),
+            _path_size(output),
+            time.perf_counter() - start,
+        )
+
+    except Exception as e:
+        return BatchResult(
+            str(source), str(output), 0, 0, time.perf_counter() - start, str(e)
+        )
+
+
+def decompress_job(task) -> BatchResult:
+    source, output, implementation = task
+    start = time.perf_counter()
+
+    try:
+        decompressor = ArchiveFactory.get_decompressor(
+            source, implementation=implementation
+        )
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        decompressor.decompress(source, output)
+        return BatchResult(
+            str(source),
+            str(output),
+            _path_size(source),
+            _path_size(output),
+            time.perf_counter() - start,
+        )
+
+    except Exception as e:
+        return BatchResult(
+            str(source), str(output), 0, 0, time.perf_counter() - start, str(e)
+        )
+
+
+def run_batch(job, tasks: Iterable, workers: int) -> Iterator[BatchResult]:
+    # файлы обрабатываются в пуле процессов (без запуска интерпретатора на
+    # каждый файл, на всех ядрах); в работе не больше 2 * workers задач,
+    # результаты - в порядке задач
+    if workers < 2:
+        return map(job, tasks)
+
+    return ordered_map(job, tasks, workers, executor_class=ProcessPoolExecutor)
+
+
+def _path_size(path) -> int:
+    path = Path(path)
+
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+    return path.stat().st_size if path.exists() else 0
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
@@ -1,13 +1,18 @@
-from .base_decompressor import BaseDecompressor
+from .base_decompressor import BaseDecompressor, StreamDecoder
 from .zstd_decompressor import ZstdDecompressor
 from .bz2_decompressor import Bz2Decompressor
 from .stdlib_zstd import StdLibZstdDecompressor
 from .stdlib_bz2 import StdLibBz2Decompressor
+from .native_decompressor import NativeDecompressor, LzhDecompressor, BwhDecompressor
 
 __all__ = [
     "BaseDecompressor",
+    "StreamDecoder",
     "ZstdDecompressor",
     "Bz2Decompressor",
     "StdLibZstdDecompressor",
     "StdLibBz2Decompressor",
+    "NativeDecompressor",
+    "LzhDecompressor",
+    "BwhDecompressor",
 ]
@@ -1,11 +1,29 @@
 from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from functools import partial
 from pathlib import Path
+import asyncio
+import shutil
 import tarfile
 import os
+from ..formats.member_index import MemberEntry, read_member_index, select_members
+from ..formats.streams import (
+    StreamFormatError,
+    iter_zstd_range,
+    merge_segments,
+    read_seek_table,
+)
+from ..utils.aio import is_path, pipe_async, stream_size
+from ..utils.iostream import open_chunks
+from ..utils.parallel import ordered_map
 
 
 class BaseDecompressor(ABC):
 
+    # соседние кадры склеиваются в задачи не меньше этого размера
+    SEGMENT_MIN_SIZE = 256 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
     def __init__(self):
         self.extension = ""
 
@@ -19,6 +37,59 @@ class BaseDecompressor(ABC):
     def decompress_data(self, data: bytes) -> bytes:
         pass
 
+    def open_stream(self, f_in):
+        # читаемый поток распакованных данных поверх открытого архива f_in;
+        # None - формат не умеет распаковывать потоком
+        return None
+
+    def open_decoder(self):
+        # пошаговая распаковка: decompress(chunk) -> bytes, flush() -> bytes.
+        # По умолчанию архив копится и распаковывается через decompress_data
+        return _BufferedDecoder(self.decompress_data)
+
+    async def decompress_async(
+        self, source, destination=None, progress_callback=None, executor=None
+    ) -> None:
+        # пути - обычный decompress в executor (в том числе распаковка tar);
+        # потоки и файловые объекты - конвейер decompress_stream_async
+        if is_path(source) and (destination is None or is_path(destination)):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                executor,
+                partial(self.decompress, source, destination, progress_callback),
+            )
+            return
+
+        if destination is None:
+            # имя результата выводится только из пути архива
+            raise ValueError("Для распаковки потока нужно указать destination")
+
+        with ExitStack() as stack:
+            if is_path(source):
+                source = stack.enter_context(open(source, "rb"))
+            if is_path(destination):
+                destination = stack.enter_context(open(destination, "wb"))
+
+            await self.decompress_stream_async(
+                source, destination, executor, progress_callback
+            )
+
+    async def decompress_stream_async(
+        self, reader, writer, executor=None, progress_callback=None, total=None
+    ) -> None:
+        # распакованный поток целиком (tar не разбирается) пишется в writer;
+        # total для прогресса - по умолчанию размер файла reader, если известен
+        decoder = self.open_decoder()
+        await pipe_async(
+            reader,
+            writer,
+            decoder.decompress,
+            decoder.flush,
+            executor,
+            progress_callback=progress_callback,
+            total=stream_size(reader) if total is None else total,
+        )
+
     def decompress(
         self, source: Path, destination: Path = None, progress_callback=None
     ) -> None:
@@ -36,20 +107,19 @@ class BaseDecompressor(ABC):
         temp_output = destination.with_suffix(".tmp")
 
         try:
-            self.decompress_file(source, temp_output, progress_callback)
-
-            if self._is_tar_archive(temp_output):
-                self._extract_tar(temp_output, destination, progress_callback)
-                temp_output.unlink()
-
-            else:
+            with open(source, "rb") as f_in:
+                stream = self.open_stream(f_in)
 
-                if temp_output != destination:
+                if stream is None:
+                    self._decompress_via_file(
+                        source, destination, temp_output, progress_callback
+                    )
+                    return
 
-                    if destination.exists():
-                        destination.unlink()
-
-                    temp_output.rename(destination)
+                with stream:
+                    self._decompress_stream_to(
+                        stream, f_in, destination, temp_output, progress_callback
+                    )
 
         except Exception as e:
 
@@ -58,7 +128,274 @@ class BaseDecompressor(ABC):
 
             raise e
 
+    def list_members(self, input_path: Path) -> list:
+        # без индекса tar читается потоком целиком, данные членов пропускаются
+        with open(input_path, "rb") as f_in, self._open_tar_stream(f_in) as tar:
+            return [
+                MemberEntry(
+                    info.name,
+                    info.size,
+                    info.mtime,
+                    info.mode,
+                    info.offset,
+                    info.offset_data - info.offset + info.size,
+                )
+                for info in tar
+            ]
+
+    def extract_member(self, input_path: Path, name: str, output_dir: Path) -> int:
+        # распаковывает член name (или директорию name целиком) в output_dir;
+        # возвращает число распакованных членов
+        output_dir = Path(output_dir)
+        extracted = set()
+
+        with open(input_path, "rb") as f_in, self._open_tar_stream(f_in) as tar:
+            for info in tar:
+
+                if not select_members([info], name):
+                    continue
+
+                output_dir.mkdir(parents=True, exist_ok=True)
+
+                if info.islnk():
+
+                    if info.linkname not in extracted:
+                        raise ValueError(
+                            f"'{info.name}' - ссылка на '{info.linkname}': "
+                            f"распакуйте их вместе"
+                        )
+
+                    self._extract_hardlink(info, output_dir)
+
+                else:
+                    tar.extract(info, output_dir, filter="data")
+
+                extracted.add(info.name)
+
+        if not extracted:
+            raise ValueError(f"В архиве нет '{name}'")
+
+        return len(extracted)
+
+    def _open_tar_stream(self, f_in):
+        stream = self.open_stream(f_in)
+
+        if stream is None:
+            raise ValueError(f"Формат '{self.extension}' не умеет читать содержимое")
+
+        head, is_tar = self._read_tar_head(stream)
+
+        if not is_tar:
+            stream.close()
+            raise ValueError("Архив содержит один файл, а не директорию")
+
+        chunks = self._iter_chunks(head, stream, lambda: None)
+        return tarfile.open(fileobj=open_chunks(chunks), mode="r|")
+
+    def _list_indexed(self, input_path: Path):
+        # индексированный .zst: читаются только индекс и таблица поиска;
+        # None - индекса нет
+        with open(input_path, "rb") as f:
+            entries = read_seek_table(f)
+            return None if entries is None else read_member_index(f, entries)
+
+    def _extract_indexed(
+        self, input_path: Path, name: str, output_dir: Path, decompress
+    ):
+        # распаковываются только кадры, покрывающие выбранные члены
+        with open(input_path, "rb") as f:
+            entries = read_seek_table(f)
+            members = None if entries is None else read_member_index(f, entries)
+
+            if members is None:
+                return None
+
+            selected = select_members(members, name)
+
+            if not selected:
+                raise ValueError(f"В архиве нет '{name}'")
+
+            by_name = {member.name: member for member in members}
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            def open_member(member):
+                chunks = iter_zstd_range(
+                    f, entries, member.offset, member.length, decompress
+                )
+                return tarfile.open(fileobj=open_chunks(chunks), mode="r|")
+
+            for member in selected:
+                with open_member(member) as tar:
+                    info = tar.next()
+
+                    if not info.islnk():
+                        tar.extract(info, output_dir, filter="data")
+                        continue
+
+                if info.linkname not in by_name:
+                    raise ValueError(f"Цель ссылки '{info.linkname}' не найдена")
+
+                # дубликат: данные первой копии под именем и правами ссылки
+                with open_member(by_name[info.linkname]) as tar:
+                    target = tar.next()
+                    target.name = info.name
+                    target.mode = info.mode
+                    target.mtime = info.mtime
+                    tar.extract(target, output_dir, filter="data")
+
+            return len(selected)
+
+    def _decompress_stream_to(
+        self, stream, f_in, destination: Path, temp_output: Path, progress_callback
+    ) -> None:
+        # tar распознаётся по первому 512-байтному заголовку и распаковывается
+        # прямо из потока ("r|"), без промежуточного файла и повторных чтений
+        total = os.fstat(f_in.fileno()).st_size
+
+        def report():
+            if progress_callback:
+                progress_callback(min(f_in.tell(), total), total)
+
+        head, is_tar = self._read_tar_head(stream)
+        chunks = self._iter_chunks(head, stream, report)
+
+        if is_tar:
+            self._extract_tar_stream(open_chunks(chunks), destination, report)
+            return
+
+        with open(temp_output, "wb") as f_out:
+            for chunk in chunks:
+                f_out.write(chunk)
+
+        if temp_output != destination:
+
+            if destination.exists():
+                destination.unlink()
+
+            temp_output.rename(destination)
+
+    def _iter_chunks(self, head: bytes, stream, report):
+        yield head
+
+        while True:
+            chunk = stream.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+            report()
+
+    @staticmethod
+    def _read_head(stream, size: int) -> bytes:
+        head = b""
+
+        while len(head) < size:
+            chunk = stream.read(size - len(head))
+            if not chunk:
+                break
+            head += chunk
+
+        return head
+
+    @staticmethod
+    def _is_tar_header(block: bytes) -> bool:
+        if len(block) < tarfile.BLOCKSIZE:
+            return False
+
+        try:
+            tarfile.TarInfo.frombuf(block, tarfile.ENCODING, "surrogateescape")
+            return True
+        except tarfile.HeaderError:
+            return False
+
+    def _read_tar_head(self, stream):
+        # (начало потока, tar ли это). Блок из нулей - конец архива сразу,
+        # но так же начинаются образы дисков и разреженные файлы: tar пустой
+        # директории - только если весь поток - нули окончания архива
+        head = self._read_head(stream, tarfile.BLOCKSIZE)
+
+        if head != bytes(tarfile.BLOCKSIZE):
+            return head, self._is_tar_header(head)
+
+        head += self._read_head(stream, tarfile.RECORDSIZE + 1 - len(head))
+        return head, self._is_empty_tar(head)
+
+    @staticmethod
+    def _is_empty_tar(data: bytes) -> bool:
+        # два нулевых блока, дополненные нулями до записи tarfile.RECORDSIZE
+        return (
+            2 * tarfile.BLOCKSIZE <= len(data) <= tarfile.RECORDSIZE
+            and len(data) % tarfile.BLOCKSIZE == 0
+            and data.count(0) == len(data)
+        )
+
+    def _extract_tar_stream(self, stream, output_dir: Path, report) -> None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+
+                if member.islnk():
+                    self._extract_hardlink(member, output_dir)
+                else:
+                    tar.extract(member, output_dir, filter="data")
+
+                report()
+
+    @staticmethod
+    def _extract_hardlink(member, output_dir: Path) -> None:
+        # жёсткие ссылки (дубликаты содержимого) восстанавливаются копией уже
+        # распакованного файла: правка одной копии не должна менять другую,
+        # а поток "r|" не умеет перечитать данные цели
+        root = output_dir.resolve()
+        source = (root / member.linkname).resolve()
+        target = (root / member.name).resolve()
+
+        if root not in source.parents or root not in target.parents:
+            raise ValueError(f"Ссылка выходит за пределы директории: {member.name}")
+
+        # права - через тот же фильтр "data", что и у остальных членов:
+        # без setuid/setgid/sticky и записи для группы и остальных
+        member = tarfile.data_filter(member, str(root))
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        if target.exists() or target.is_symlink():
+            target.unlink()
+
+        shutil.copyfile(source, target)
+
+        if member.mode is not None:
+            os.chmod(target, member.mode)
+
+        os.utime(target, (member.mtime, member.mtime))
+
+    def _decompress_via_file(
+        self, source: Path, destination: Path, temp_output: Path, progress_callback
+    ) -> None:
+        # для форматов без open_stream: распаковка во временный файл
+        self.decompress_file(source, temp_output, progress_callback)
+
+        if self._is_tar_archive(temp_output):
+            self._extract_tar(temp_output, destination, progress_callback)
+            temp_output.unlink()
+
+        else:
+
+            if temp_output != destination:
+
+                if destination.exists():
+                    destination.unlink()
+
+                temp_output.rename(destination)
+
     def _is_tar_archive(self, file_path: Path) -> bool:
+        with open(file_path, "rb") as f:
+            head = f.read(tarfile.RECORDSIZE + 1)
+
+        if head[: tarfile.BLOCKSIZE] == bytes(tarfile.BLOCKSIZE):
+            return self._is_empty_tar(head)
+
         try:
             with tarfile.open(file_path, "r") as tar:
                 return True
@@ -75,10 +412,139 @@ class BaseDecompressor(ABC):
             total = len(members)
 
             for i, member in enumerate(members):
-                tar.extract(member, output_dir)
+
+                if member.islnk():
+                    self._extract_hardlink(member, output_dir)
+                else:
+                    tar.extract(member, output_dir, filter="data")
 
                 if progress_callback and total > 0:
                     progress_callback(i + 1, total)
 
+    def _copy_stream(
+        self, stream, f_in, output_path: Path, total: int, progress_callback=None
+    ) -> None:
+        # общий путь decompress_file: поток распакованных данных в файл,
+        # прогресс - по позиции в сжатом файле
+        with open(output_path, "wb") as f_out:
+            while True:
+                chunk = stream.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                f_out.write(chunk)
+
+                if progress_callback:
+                    progress_callback(min(f_in.tell(), total), total)
+
+    @staticmethod
+    def _find_parallel_segments(f_in, find_segments, threads: int):
+        # None - распаковывать последовательно: один поток, один кадр или
+        # нераспознанная структура (ошибку тогда сообщит обычный путь)
+        if threads < 2:
+            return None
+
+        try:
+            segments = find_segments(f_in)
+
+        except StreamFormatError:
+            return None
+
+        finally:
+            f_in.seek(0)
+
+        return segments if len(segments) > 1 else None
+
+    def _open_segments_stream(
+        self, f_in, segments: list, decompress_segment, threads: int, fallback=None
+    ):
+        return open_chunks(
+            self._iter_segments_parallel(
+                f_in, segments, decompress_segment, threads, fallback
+            )
+        )
+
+    def _sequential_fallback(self, open_func):
+        def fallback(f_in):
+            with open_func(f_in, "rb") as stream:
+                yield from iter(lambda: stream.read(self.CHUNK_SIZE), b"")
+
+        return fallback
+
+    def _iter_segments_parallel(
+        self, f_in, segments: list, decompress_segment, threads: int, fallback=None
+    ):
+        # независимые кадры/потоки распаковываются в пуле потоков (zstd и bz2
+        # отпускают GIL) и выдаются в исходном порядке. Если сегмент не
+        # распаковался, а fallback задан, остаток файла с начала этого сегмента
+        # читается последовательно через fallback(f_in)
+        segments = merge_segments(segments, self.SEGMENT_MIN_SIZE)
+
+        def pieces():
+            for offset, size in segments:
+                f_in.seek(offset)
+                yield f_in.read(size)
+
+        results = ordered_map(decompress_segment, pieces(), threads)
+        done = 0
+
+        try:
+            for raw in results:
+                yield raw
+                done += 1
+
+        except (OSError, ValueError):
+
+            if fallback is None:
+                raise
+
+            results.close()
+            f_in.seek(segments[done][0])
+            yield from fallback(f_in)
+
     def get_extension(self) -> str:
         return self.extension
+
+
+class StreamDecoder:
+    # пошаговая распаковка склейки кадров zstd или потоков bz2: после конца
+    # кадра остаток данных отдаётся новому распаковщику new_decompressor()
+    def __init__(self, new_decompressor):
+        self._new_decompressor = new_decompressor
+        self._decompressor = None
+
+    def decompress(self, data: bytes) -> bytes:
+        output = bytearray()
+
+        while data:
+            if self._decompressor is None:
+                self._decompressor = self._new_decompressor()
+
+            output += self._decompressor.decompress(data)
+
+            if not self._decompressor.eof:
+                break
+
+            data = self._decompressor.unused_data
+            self._decompressor = None
+
+        return bytes(output)
+
+    def flush(self) -> bytes:
+        if self._decompressor is not None:
+            raise ValueError("Архив обрезан: последний кадр не завершён")
+
+        return b""
+
+
+class _BufferedDecoder:
+    # для форматов без пошаговой распаковки: весь архив в памяти до flush
+    def __init__(self, decompress_data):
+        self._decompress_data = decompress_data
+        self._buffer = bytearray()
+
+    def decompress(self, data: bytes) -> bytes:
+        self._buffer += data
+        return b""
+
+    def flush(self) -> bytes:
+        return self._decompress_data(bytes(self._buffer))
@@ -1,13 +1,15 @@
 from pathlib import Path
 import bz2
-from .base_decompressor import BaseDecompressor
+from .base_decompressor import BaseDecompressor, StreamDecoder
+from ..formats.streams import bz2_segments
 
 
 class Bz2Decompressor(BaseDecompressor):
 
-    def __init__(self):
+    def __init__(self, threads: int = 1):
         super().__init__()
         self.extension = ".bz2"
+        self.threads = max(1, threads)
 
     def decompress_data(self, data: bytes) -> bytes:
         if not data:
@@ -30,24 +32,33 @@ class Bz2Decompressor(BaseDecompressor):
             progress_callback(0, file_size)
 
         try:
-            with bz2.open(str(input_path), "rb") as f_in:
-                with open(output_path, "wb") as f_out:
-                    chunk_size = 65536
-                    bytes_processed = 0
-
-                    while True:
-                        chunk = f_in.read(chunk_size)
-                        if not chunk:
-                            break
-                        f_out.write(chunk)
-                        bytes_processed += chunk_size
-
-                        if progress_callback:
-                            progress_callback(
-                                min(bytes_processed, file_size), file_size
-                            )
+            with open(input_path, "rb") as f_in, self.open_stream(f_in) as stream:
+                self._copy_stream(
+                    stream, f_in, output_path, file_size, progress_callback
+                )
         except Exception as e:
             raise RuntimeError(f"Ошибка при распаковке файла: {e}")
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def open_decoder(self):
+        # склейка потоков bz2 (pbzip2, многопоточное сжатие)
+        return StreamDecoder(bz2.BZ2Decompressor)
+
+    def open_stream(self, f_in):
+        segments = self._find_parallel_segments(f_in, bz2_segments, self.threads)
+
+        if segments:
+            # сигнатура потока может случайно найтись внутри сжатых данных:
+            # тогда остаток файла распаковывается последовательно
+            return self._open_segments_stream(
+                f_in,
+                segments,
+                bz2.decompress,
+                self.threads,
+                self._sequential_fallback(bz2.open),
+            )
+
+        return bz2.open(f_in, "rb")
+
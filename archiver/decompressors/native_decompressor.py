@@ -0,0 +1,155 @@
+from abc import abstractmethod
+from pathlib import Path
+import io
+from .base_decompressor import BaseDecompressor
+from ..algorithms.pipelines import decompress_bwh_block, decompress_lzh_block
+from ..formats.native import (
+    BLOCK_HEADER,
+    BLOCK_STORED,
+    BWH_MAGIC,
+    FILE_HEADER,
+    LZH_MAGIC,
+    NativeFormatError,
+    check_block,
+    read_blocks,
+    read_file_header,
+)
+from ..utils.iostream import open_chunks
+
+
+class NativeDecompressor(BaseDecompressor):
+
+    MAGIC = b""
+
+    @abstractmethod
+    def decompress_block(self, payload: bytes, raw_size: int) -> bytes:
+        pass
+
+    def decompress_data(self, data: bytes) -> bytes:
+        if not data:
+            return b""
+
+        output = io.BytesIO()
+        self._decompress_stream(io.BytesIO(data), output, len(data))
+        return output.getvalue()
+
+    def decompress_file(
+        self, input_path: Path, output_path: Path, progress_callback=None
+    ) -> None:
+        input_path = Path(input_path)
+        output_path = Path(output_path)
+        file_size = input_path.stat().st_size
+
+        if progress_callback:
+            progress_callback(0, file_size)
+
+        try:
+            with open(input_path, "rb") as f_in, open(output_path, "wb") as f_out:
+                self._decompress_stream(f_in, f_out, file_size, progress_callback)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при распаковке файла: {e}")
+
+        if progress_callback:
+            progress_callback(file_size, file_size)
+
+    def open_decoder(self):
+        return _NativeDecoder(self)
+
+    def open_stream(self, f_in):
+        read_file_header(f_in, self.MAGIC)
+        return open_chunks(self._iter_blocks(f_in))
+
+    def _decompress_stream(self, f_in, f_out, total: int, progress_callback=None):
+        read_file_header(f_in, self.MAGIC)
+
+        for raw in self._iter_blocks(f_in):
+            f_out.write(raw)
+
+            if progress_callback:
+                progress_callback(min(f_in.tell(), total), total)
+
+    def _iter_blocks(self, f_in):
+        for flags, raw_size, payload, crc in read_blocks(f_in):
+
+            if flags & BLOCK_STORED:
+                raw = payload
+            else:
+                raw = self.decompress_block(payload, raw_size)
+
+            check_block(raw, raw_size, crc)
+            yield raw
+
+
+class _NativeDecoder:
+    # пошаговое чтение контейнера: блок распаковывается, как только пришёл
+    # целиком; проверки флагов и crc - те же, что при чтении файла
+    def __init__(self, decompressor: NativeDecompressor):
+        self._decompressor = decompressor
+        self._buffer = bytearray()
+        self._header_read = False
+
+    def decompress(self, data: bytes) -> bytes:
+        self._buffer += data
+
+        if not self._header_read:
+
+            if len(self._buffer) < FILE_HEADER.size:
+                return b""
+
+            self._read_header()
+
+        output = bytearray()
+
+        while len(self._buffer) >= BLOCK_HEADER.size:
+            stored_size = BLOCK_HEADER.unpack_from(self._buffer)[2]
+            end = BLOCK_HEADER.size + stored_size
+
+            if len(self._buffer) < end:
+                break
+
+            block = io.BytesIO(bytes(self._buffer[:end]))
+            del self._buffer[:end]
+
+            for raw in self._decompressor._iter_blocks(block):
+                output += raw
+
+        return bytes(output)
+
+    def flush(self) -> bytes:
+        if not self._header_read:
+            self._read_header()
+
+        if self._buffer:
+            raise NativeFormatError("Обрезанный заголовок или данные блока")
+
+        return b""
+
+    def _read_header(self) -> None:
+        header = io.BytesIO(bytes(self._buffer[: FILE_HEADER.size]))
+        read_file_header(header, self._decompressor.MAGIC)
+        del self._buffer[: FILE_HEADER.size]
+        self._header_read = True
+
+
+class LzhDecompressor(NativeDecompressor):
+
+    MAGIC = LZH_MAGIC
+
+    def __init__(self):
+        super().__init__()
+        self.extension = ".lzh"
+
+    def decompress_block(self, payload: bytes, raw_size: int) -> bytes:
+        return decompress_lzh_block(payload, raw_size)
+
+
+class BwhDecompressor(NativeDecompressor):
+
+    MAGIC = BWH_MAGIC
+
+    def __init__(self):
+        super().__init__()
+        self.extension = ".bwh"
+
+    def decompress_block(self, payload: bytes, raw_size: int) -> bytes:
+        return decompress_bwh_block(payload)
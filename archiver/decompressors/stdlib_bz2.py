@@ -1,13 +1,15 @@
 from pathlib import Path
 import bz2
-from .base_decompressor import BaseDecompressor
+from .base_decompressor import BaseDecompressor, StreamDecoder
+from ..formats.streams import bz2_segments
 
 
 class StdLibBz2Decompressor(BaseDecompressor):
 
-    def __init__(self):
+    def __init__(self, threads: int = 1):
         super().__init__()
         self.extension = ".bz2"
+        self.threads = max(1, threads)
 
     def decompress_data(self, data: bytes) -> bytes:
 
@@ -22,20 +24,32 @@ class StdLibBz2Decompressor(BaseDecompressor):
         input_path = Path(input_path)
         output_path = Path(output_path)
         file_size = input_path.stat().st_size
-        processed = 0
 
         if progress_callback:
             progress_callback(0, file_size)
 
-        with bz2.open(input_path, "rb") as src, open(output_path, "wb") as dst:
-            while True:
-                chunk = src.read(1024 * 1024)
-                if not chunk:
-                    break
-                dst.write(chunk)
-                processed += len(chunk)
-                if progress_callback and file_size > 0:
-                    progress_callback(processed, file_size)
+        with open(input_path, "rb") as f_in, self.open_stream(f_in) as stream:
+            self._copy_stream(stream, f_in, output_path, file_size, progress_callback)
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def open_decoder(self):
+        return StreamDecoder(bz2.BZ2Decompressor)
+
+    def open_stream(self, f_in):
+        segments = self._find_parallel_segments(f_in, bz2_segments, self.threads)
+
+        if segments:
+            # сигнатура потока может случайно найтись внутри сжатых данных:
+            # тогда остаток файла распаковывается последовательно
+            return self._open_segments_stream(
+                f_in,
+                segments,
+                bz2.decompress,
+                self.threads,
+                self._sequential_fallback(bz2.open),
+            )
+
+        return bz2.open(f_in, "rb")
+
@@ -1,13 +1,15 @@
 from pathlib import Path
 from compression import zstd
-from .base_decompressor import BaseDecompressor
+from .base_decompressor import BaseDecompressor, StreamDecoder
+from ..formats.streams import read_seek_table, read_zstd_range, zstd_segments
 
 
 class StdLibZstdDecompressor(BaseDecompressor):
 
-    def __init__(self):
+    def __init__(self, threads: int = 1):
         super().__init__()
         self.extension = ".zst"
+        self.threads = max(1, threads)
 
     def decompress_data(self, data: bytes) -> bytes:
 
@@ -22,20 +24,52 @@ class StdLibZstdDecompressor(BaseDecompressor):
         input_path = Path(input_path)
         output_path = Path(output_path)
         file_size = input_path.stat().st_size
-        processed = 0
 
         if progress_callback:
             progress_callback(0, file_size)
 
-        with zstd.open(input_path, "rb") as src, open(output_path, "wb") as dst:
-            while True:
-                chunk = src.read(1024 * 1024)
-                if not chunk:
-                    break
-                dst.write(chunk)
-                processed += len(chunk)
-                if progress_callback and file_size > 0:
-                    progress_callback(processed, file_size)
+        with open(input_path, "rb") as f_in, self.open_stream(f_in) as stream:
+            self._copy_stream(stream, f_in, output_path, file_size, progress_callback)
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def open_decoder(self):
+        return StreamDecoder(zstd.ZstdDecompressor)
+
+    def open_stream(self, f_in):
+        segments = self._find_parallel_segments(f_in, zstd_segments, self.threads)
+
+        if segments:
+            return self._open_segments_stream(
+                f_in, segments, zstd.decompress, self.threads
+            )
+
+        return zstd.open(f_in, "rb")
+
+    def list_members(self, input_path: Path) -> list:
+        members = self._list_indexed(input_path)
+        return super().list_members(input_path) if members is None else members
+
+    def extract_member(self, input_path: Path, name: str, output_dir: Path) -> int:
+        count = self._extract_indexed(input_path, name, output_dir, zstd.decompress)
+
+        if count is None:
+            return super().extract_member(input_path, name, output_dir)
+
+        return count
+
+    def read_range(self, input_path: Path, offset: int, length: int) -> bytes:
+
+        if offset < 0 or length < 0:
+            raise ValueError("Смещение и длина должны быть неотрицательными")
+
+        with open(input_path, "rb") as f:
+            entries = read_seek_table(f)
+
+            if entries is not None:
+                return read_zstd_range(f, entries, offset, length, zstd.decompress)
+
+        with zstd.open(input_path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
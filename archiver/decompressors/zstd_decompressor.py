@@ -2,14 +2,16 @@ from pathlib import Path
 from compression import zstd
 
 
-from .base_decompressor import BaseDecompressor
+from .base_decompressor import BaseDecompressor, StreamDecoder
+from ..formats.streams import read_seek_table, read_zstd_range, zstd_segments
 
 
 class ZstdDecompressor(BaseDecompressor):
 
-    def __init__(self):
+    def __init__(self, threads: int = 1):
         super().__init__()
         self.extension = ".zst"
+        self.threads = max(1, threads)
 
     def decompress_data(self, data: bytes) -> bytes:
         if not data:
@@ -32,24 +34,58 @@ class ZstdDecompressor(BaseDecompressor):
             progress_callback(0, file_size)
 
         try:
-            with zstd.open(str(input_path), "rb") as f_in:
-                with open(output_path, "wb") as f_out:
-                    chunk_size = 65536
-                    bytes_processed = 0
-
-                    while True:
-                        chunk = f_in.read(chunk_size)
-                        if not chunk:
-                            break
-                        f_out.write(chunk)
-                        bytes_processed += chunk_size
-
-                        if progress_callback:
-                            progress_callback(
-                                min(bytes_processed, file_size), file_size
-                            )
+            with open(input_path, "rb") as f_in, self.open_stream(f_in) as stream:
+                self._copy_stream(
+                    stream, f_in, output_path, file_size, progress_callback
+                )
         except Exception as e:
             raise RuntimeError(f"Ошибка при распаковке файла: {e}")
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def open_decoder(self):
+        # склейка кадров, включая пропускаемые (таблица поиска, индекс)
+        return StreamDecoder(zstd.ZstdDecompressor)
+
+    def open_stream(self, f_in):
+        segments = self._find_parallel_segments(f_in, zstd_segments, self.threads)
+
+        if segments:
+            return self._open_segments_stream(
+                f_in, segments, zstd.decompress, self.threads
+            )
+
+        return zstd.open(f_in, "rb")
+
+    def list_members(self, input_path: Path) -> list:
+        members = self._list_indexed(input_path)
+        return super().list_members(input_path) if members is None else members
+
+    def extract_member(self, input_path: Path, name: str, output_dir: Path) -> int:
+        count = self._extract_indexed(input_path, name, output_dir, zstd.decompress)
+
+        if count is None:
+            return super().extract_member(input_path, name, output_dir)
+
+        return count
+
+    def read_range(self, input_path: Path, offset: int, length: int) -> bytes:
+
+        if offset < 0 or length < 0:
+            raise ValueError("Смещение и длина должны быть неотрицательными")
+
+        try:
+            with open(input_path, "rb") as f:
+                entries = read_seek_table(f)
+
+                if entries is not None:
+                    return read_zstd_range(f, entries, offset, length, zstd.decompress)
+
+            # без таблицы поиска приходится распаковывать с начала
+            with zstd.open(str(input_path), "rb") as f:
+                f.seek(offset)
+                return f.read(length)
+
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при чтении диапазона: {e}")
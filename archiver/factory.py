@@ -1,11 +1,15 @@
+import inspect
+import weakref
 from pathlib import Path
-from typing import Union
+from typing import BinaryIO, Optional, Union
 from .my_compressors import (
     BaseCompressor,
     ZstdCompressor,
     Bz2Compressor,
     StdLibZstdCompressor,
     StdLibBz2Compressor,
+    LzhCompressor,
+    BwhCompressor,
 )
 from .decompressors import (
     BaseDecompressor,
@@ -13,7 +17,11 @@ from .decompressors import (
     Bz2Decompressor,
     StdLibZstdDecompressor,
     StdLibBz2Decompressor,
+    LzhDecompressor,
+    BwhDecompressor,
 )
+from .formats import BWH_MAGIC, BZ2_MAGIC, LZH_MAGIC, ZSTD_MAGIC
+from .selection import DEFAULT_CANDIDATES, CodecChoice, read_sample, select_codec
 
 
 class ArchiveFactory:
@@ -40,12 +48,19 @@ class ArchiveFactory:
         },
     }
 
+    # сигнатуры первых байт архива: формат определяется по содержимому,
+    # а не по имени (переименованные файлы, каналы)
+    _signatures = {}
+    # результат определения для открытых файлов: повторно не читается
+    _detected = weakref.WeakKeyDictionary()
+
     @classmethod
     def get_compressor(
         cls,
         archive_path: Union[str, Path],
         level: int = 9,
         implementation: str = "custom",
+        **options,
     ) -> BaseCompressor:
         archive_path = Path(archive_path)
         ext = archive_path.suffix.lower()
@@ -66,17 +81,96 @@ class ArchiveFactory:
             )
 
         compressor_class = compressors[impl]
-        return compressor_class(level=level)
+        cls._check_options(compressor_class, options, impl, ext)
+        return compressor_class(level=level, **options)
+
+    @classmethod
+    def choose_codec(
+        cls,
+        source: Union[str, Path],
+        min_speed: Optional[float] = None,
+        min_ratio: Optional[float] = None,
+        candidates=DEFAULT_CANDIDATES,
+        manifest=None,
+        implementation: str = "custom",
+        **options,
+    ) -> CodecChoice:
+        # формат и уровень по пробному сжатию выборки из source: лучшее сжатие
+        # не медленнее min_speed МБ/с или самый быстрый со степенью сжатия
+        # не ниже min_ratio %. Кандидаты, чья реализация не принимает
+        # options (indexed, seekable - только у zstd), не рассматриваются
+        impl = implementation or "custom"
+        impl = impl.lower()
+        candidates = [
+            (extension, level)
+            for extension, level in candidates
+            if cls._accepts_options(extension, impl, options)
+        ]
+
+        if not candidates:
+            raise ValueError(
+                f"Нет формата с реализацией '{impl}' и параметрами: "
+                f"{', '.join(options) or '-'}"
+            )
+
+        sample = read_sample(source, manifest=manifest)
+
+        def make_compressor(extension, level):
+            return cls.get_compressor(
+                f"sample{extension}", level=level, implementation=impl
+            )
+
+        return select_codec(sample, make_compressor, min_speed, min_ratio, candidates)
+
+    @classmethod
+    def get_auto_compressor(
+        cls,
+        source: Union[str, Path],
+        min_speed: Optional[float] = None,
+        min_ratio: Optional[float] = None,
+        implementation: str = "custom",
+        **options,
+    ) -> BaseCompressor:
+        choice = cls.choose_codec(
+            source, min_speed, min_ratio, implementation=implementation, **options
+        )
+        return cls.get_compressor(
+            f"archive{choice.extension}",
+            level=choice.level,
+            implementation=implementation,
+            **options,
+        )
+
+    @classmethod
+    def _accepts_options(cls, extension: str, impl: str, options: dict) -> bool:
+        compressor_class = cls._compressors.get(extension, {}).get(impl)
+
+        if compressor_class is None:
+            return False
+
+        try:
+            cls._check_options(compressor_class, options, impl, extension)
+        except ValueError:
+            return False
+
+        return True
 
     @classmethod
     def get_decompressor(
-        cls, archive_path: Union[str, Path], implementation: str = "custom"
+        cls,
+        archive_path: Union[str, Path, BinaryIO],
+        implementation: str = "custom",
+        **options,
     ) -> BaseDecompressor:
-        archive_path = Path(archive_path)
-        ext = archive_path.suffix.lower()
+        # archive_path - путь или открытый двоичный файл; сигнатура важнее
+        # расширения, расширение - запасной вариант для нераспознанных данных
+        ext = cls.detect_format(archive_path) or cls._source_suffix(archive_path)
         impl = implementation or "custom"
         impl = impl.lower()
 
+        if not ext:
+            raise ValueError("Не удалось определить формат архива")
+
         if ext not in cls._decompressors:
             supported = ", ".join(cls._decompressors.keys())
             raise ValueError(
@@ -91,7 +185,69 @@ class ArchiveFactory:
             )
 
         decompressor_class = decompressors[impl]
-        return decompressor_class()
+        cls._check_options(decompressor_class, options, impl, ext)
+        return decompressor_class(**options)
+
+    @classmethod
+    def detect_format(cls, source: Union[str, Path, BinaryIO]) -> Optional[str]:
+        # расширение формата по сигнатуре или None. Файл по пути читается
+        # заново (мог измениться), для открытого файла первые байты читаются
+        # без сдвига позиции один раз на объект
+        size = max((len(sig) for sig in cls._signatures), default=0)
+
+        if isinstance(source, (str, Path)):
+            try:
+                with open(source, "rb") as f:
+                    return cls._match_signature(f.read(size))
+            except OSError:
+                return None
+
+        if source not in cls._detected:
+            cls._detected[source] = cls._match_signature(cls._peek(source, size))
+
+        return cls._detected[source]
+
+    @classmethod
+    def _match_signature(cls, head: bytes) -> Optional[str]:
+        # длинные сигнатуры проверяются первыми
+        for signature in sorted(cls._signatures, key=len, reverse=True):
+            if head.startswith(signature):
+                return cls._signatures[signature]
+
+        return None
+
+    @staticmethod
+    def _peek(f, size: int) -> bytes:
+        if hasattr(f, "peek"):
+            return f.peek(size)[:size]
+
+        if f.seekable():
+            position = f.tell()
+            head = f.read(size)
+            f.seek(position)
+            return head
+
+        raise ValueError("Формат потока без peek и seek не определить")
+
+    @staticmethod
+    def _source_suffix(source) -> str:
+        name = source
+
+        if not isinstance(source, (str, Path)):
+            name = getattr(source, "name", "")
+
+        return Path(name).suffix.lower() if isinstance(name, (str, Path)) else ""
+
+    @staticmethod
+    def _check_options(target_class: type, options: dict, impl: str, ext: str):
+        params = inspect.signature(target_class.__init__).parameters
+        unsupported = [name for name in options if name not in params]
+
+        if unsupported:
+            raise ValueError(
+                f"Реализация '{impl}' для '{ext}' не поддерживает параметры: "
+                f"{', '.join(unsupported)}"
+            )
 
     @classmethod
     def register_compressor(
@@ -118,6 +274,12 @@ class ArchiveFactory:
         impl = impl.lower()
         cls._decompressors.setdefault(extension, {})[impl] = decompressor_class
 
+    @classmethod
+    def register_signature(cls, extension: str, signature: bytes):
+        if not extension.startswith("."):
+            extension = "." + extension
+        cls._signatures[bytes(signature)] = extension.lower()
+
     @classmethod
     def supported_extensions(cls) -> list:
         extensions = set(cls._compressors.keys()) | set(cls._decompressors.keys())
@@ -132,3 +294,16 @@ class ArchiveFactory:
         decompressor_impls = set(cls._decompressors.get(extension, {}).keys())
         implementations = compressor_impls | decompressor_impls
         return sorted(list(implementations))
+
+
+# собственные форматы на алгоритмах из archiver.algorithms
+ArchiveFactory.register_compressor(".lzh", LzhCompressor)
+ArchiveFactory.register_compressor(".bwh", BwhCompressor)
+ArchiveFactory.register_decompressor(".lzh", LzhDecompressor)
+ArchiveFactory.register_decompressor(".bwh", BwhDecompressor)
+
+# магия кадра zstd хранится в little-endian: 28 B5 2F FD
+ArchiveFactory.register_signature(".zst", ZSTD_MAGIC.to_bytes(4, "little"))
+ArchiveFactory.register_signature(".bz2", BZ2_MAGIC)
+ArchiveFactory.register_signature(".lzh", LZH_MAGIC)
+ArchiveFactory.register_signature(".bwh", BWH_MAGIC)
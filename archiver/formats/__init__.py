@@ -0,0 +1,63 @@
+from .native import (
+    BLOCK_STORED,
+    BWH_MAGIC,
+    LZH_MAGIC,
+    NativeFormatError,
+    check_block,
+    read_blocks,
+    read_file_header,
+    write_block,
+    write_file_header,
+)
+from .member_index import (
+    MEMBER_INDEX_MAGIC,
+    MemberEntry,
+    build_member_index,
+    read_member_index,
+    select_members,
+)
+from .streams import (
+    BZ2_MAGIC,
+    ZSTD_MAGIC,
+    StreamFormatError,
+    build_seek_table,
+    bz2_segments,
+    find_bz2_streams,
+    iter_zstd_frames,
+    iter_zstd_range,
+    merge_segments,
+    read_seek_table,
+    read_zstd_frame,
+    read_zstd_range,
+    zstd_segments,
+)
+
+__all__ = [
+    "BLOCK_STORED",
+    "BWH_MAGIC",
+    "LZH_MAGIC",
+    "NativeFormatError",
+    "check_block",
+    "read_blocks",
+    "read_file_header",
+    "write_block",
+    "write_file_header",
+    "MEMBER_INDEX_MAGIC",
+    "MemberEntry",
+    "build_member_index",
+    "read_member_index",
+    "select_members",
+    "BZ2_MAGIC",
+    "ZSTD_MAGIC",
+    "StreamFormatError",
+    "build_seek_table",
+    "bz2_segments",
+    "find_bz2_streams",
+    "iter_zstd_frames",
+    "iter_zstd_range",
+    "merge_segments",
+    "read_seek_table",
+    "read_zstd_frame",
+    "read_zstd_range",
+    "zstd_segments",
+]
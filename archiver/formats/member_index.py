@@ -0,0 +1,79 @@
+import struct
+from typing import List, NamedTuple, Optional
+
+from .streams import StreamFormatError
+
+# индекс членов tar в пропускаемом кадре zstd перед таблицей поиска:
+# обычный zstd его пропускает, list/extract читают только его и нужные кадры
+MEMBER_INDEX_MAGIC = 0x184D2A5B
+
+_SKIPPABLE_HEADER = struct.Struct("<II")
+# смещение и длина члена в распакованном tar, размер, mtime, mode, длина имени
+_MEMBER = struct.Struct("<QQQdIH")
+
+
+class MemberEntry(NamedTuple):
+    name: str
+    size: int
+    mtime: float
+    mode: int
+    offset: int
+    length: int
+
+
+def build_member_index(members) -> bytes:
+    body = bytearray()
+
+    for member in members:
+        name = member.name.encode("utf-8", "surrogateescape")
+        body += _MEMBER.pack(
+            member.offset,
+            member.length,
+            member.size,
+            member.mtime,
+            member.mode,
+            len(name),
+        )
+        body += name
+
+    return _SKIPPABLE_HEADER.pack(MEMBER_INDEX_MAGIC, len(body)) + bytes(body)
+
+
+def read_member_index(f, entries) -> Optional[List[MemberEntry]]:
+    # кадр индекса лежит сразу за кадрами данных из таблицы поиска;
+    # None - архив записан без индекса
+    f.seek(sum(stored for stored, _ in entries))
+    header = f.read(_SKIPPABLE_HEADER.size)
+
+    if len(header) < _SKIPPABLE_HEADER.size:
+        return None
+
+    magic, size = _SKIPPABLE_HEADER.unpack(header)
+
+    if magic != MEMBER_INDEX_MAGIC:
+        return None
+
+    body = f.read(size)
+
+    if len(body) < size:
+        raise StreamFormatError("Обрезанный индекс членов архива")
+
+    members = []
+    pos = 0
+
+    while pos < size:
+        offset, length, member_size, mtime, mode, name_len = _MEMBER.unpack_from(
+            body, pos
+        )
+        pos += _MEMBER.size
+        name = body[pos : pos + name_len].decode("utf-8", "surrogateescape")
+        pos += name_len
+        members.append(MemberEntry(name, member_size, mtime, mode, offset, length))
+
+    return members
+
+
+def select_members(members, name: str) -> list:
+    # точное имя или все члены внутри директории name
+    prefix = name.rstrip("/") + "/"
+    return [m for m in members if m.name == name or m.name.startswith(prefix)]
@@ -0,0 +1,77 @@
+import struct
+import zlib
+
+# Блочный контейнер собственных форматов (.lzh, .bwh):
+#   заголовок файла: magic (4 байта), версия, размер блока
+#   блок: флаги, исходный размер, размер данных, crc32 исходных данных, данные
+FILE_HEADER = struct.Struct(">4sBI")
+BLOCK_HEADER = struct.Struct(">BIII")
+VERSION = 1
+
+# флаги блока: данные хранятся без сжатия (несжимаемый блок)
+BLOCK_STORED = 0x01
+KNOWN_BLOCK_FLAGS = BLOCK_STORED
+
+LZH_MAGIC = b"LZH1"
+BWH_MAGIC = b"BWH1"
+
+
+class NativeFormatError(ValueError):
+    pass
+
+
+def write_file_header(f, magic: bytes, block_size: int) -> None:
+    f.write(FILE_HEADER.pack(magic, VERSION, block_size))
+
+
+def read_file_header(f, magic: bytes) -> int:
+    header = f.read(FILE_HEADER.size)
+
+    if len(header) < FILE_HEADER.size:
+        raise NativeFormatError("Файл слишком короткий для заголовка архива")
+
+    file_magic, version, block_size = FILE_HEADER.unpack(header)
+
+    if file_magic != magic:
+        raise NativeFormatError(f"Неверная сигнатура архива: {file_magic!r}")
+
+    if version != VERSION:
+        raise NativeFormatError(f"Неподдерживаемая версия формата: {version}")
+
+    return block_size
+
+
+def write_block(f, raw: bytes, payload: bytes, flags: int = 0) -> None:
+    crc = zlib.crc32(raw)
+    f.write(BLOCK_HEADER.pack(flags, len(raw), len(payload), crc))
+    f.write(payload)
+
+
+def read_blocks(f):
+    # выдаёт (флаги, исходный размер, данные, crc32) до конца файла
+    while True:
+        header = f.read(BLOCK_HEADER.size)
+
+        if not header:
+            return
+
+        if len(header) < BLOCK_HEADER.size:
+            raise NativeFormatError("Обрезанный заголовок блока")
+
+        flags, raw_size, stored_size, crc = BLOCK_HEADER.unpack(header)
+
+        if flags & ~KNOWN_BLOCK_FLAGS:
+            raise NativeFormatError(f"Неизвестные флаги блока: {flags:#04x}")
+
+        payload = f.read(stored_size)
+
+        if len(payload) < stored_size:
+            raise NativeFormatError("Обрезанные данные блока")
+
+        yield flags, raw_size, payload, crc
+
+
+def check_block(raw: bytes, raw_size: int, crc: int) -> None:
+
+    if len(raw) != raw_size or zlib.crc32(raw) != crc:
+        raise NativeFormatError("Контрольная сумма блока не совпадает")
@@ -0,0 +1,270 @@
+import re
+import struct
+from bisect import bisect_right
+from itertools import accumulate
+
+ZSTD_MAGIC = 0xFD2FB528
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+
+# таблица поиска формата zstd seekable: пропускаемый кадр в конце файла
+ZSTD_SEEK_TABLE_MAGIC = 0x184D2A5E
+ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+ZSTD_SEEK_CHECKSUM_FLAG = 0x80
+
+BZ2_MAGIC = b"BZh"
+
+# начало потока bz2: "BZh" + уровень + магия первого блока (pi) или конца потока
+BZ2_STREAM_START = re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)")
+
+_U32 = struct.Struct("<I")
+_SKIPPABLE_HEADER = struct.Struct("<II")
+_SEEK_ENTRY = struct.Struct("<II")
+_SEEK_FOOTER = struct.Struct("<IBI")
+
+
+class StreamFormatError(ValueError):
+    pass
+
+
+def read_zstd_frame(f):
+    # разбирает кадр, начинающийся с текущей позиции f, не распаковывая его;
+    # возвращает (полный размер, размер содержимого или None, пропускаемый ли)
+    # или None в конце файла. Поддерживаются обычные и пропускаемые кадры
+    magic_bytes = f.read(4)
+
+    if not magic_bytes:
+        return None
+
+    if len(magic_bytes) < 4:
+        raise StreamFormatError("Обрезанный заголовок кадра zstd")
+
+    (magic,) = _U32.unpack(magic_bytes)
+
+    if magic & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE_MAGIC:
+        size_bytes = f.read(4)
+
+        if len(size_bytes) < 4:
+            raise StreamFormatError("Обрезанный пропускаемый кадр zstd")
+
+        (size,) = _U32.unpack(size_bytes)
+        f.seek(size, 1)
+        return 8 + size, None, True
+
+    if magic != ZSTD_MAGIC:
+        raise StreamFormatError(f"Неверная сигнатура кадра zstd: {magic:#010x}")
+
+    descriptor = f.read(1)
+
+    if not descriptor:
+        raise StreamFormatError("Обрезанный заголовок кадра zstd")
+
+    fhd = descriptor[0]
+    fcs_flag = fhd >> 6
+    single_segment = (fhd >> 5) & 1
+    has_checksum = (fhd >> 2) & 1
+    dict_id_size = (0, 1, 2, 4)[fhd & 3]
+    fcs_size = (single_segment, 2, 4, 8)[fcs_flag]
+    window_size = 0 if single_segment else 1
+    header = f.read(window_size + dict_id_size + fcs_size)
+
+    if len(header) < window_size + dict_id_size + fcs_size:
+        raise StreamFormatError("Обрезанный заголовок кадра zstd")
+
+    content_size = None
+
+    if fcs_size:
+        content_size = int.from_bytes(header[-fcs_size:], "little")
+
+        if fcs_size == 2:
+            content_size += 256
+
+    total = 5 + len(header)
+
+    while True:
+        block_header = f.read(3)
+
+        if len(block_header) < 3:
+            raise StreamFormatError("Обрезанный блок zstd")
+
+        value = int.from_bytes(block_header, "little")
+        block_type = (value >> 1) & 3
+        block_size = value >> 3
+
+        if block_type == 3:
+            raise StreamFormatError("Неверный тип блока zstd")
+
+        # RLE-блок хранит один байт, остальные - block_size байт
+        stored = 1 if block_type == 1 else block_size
+        f.seek(stored, 1)
+        total += 3 + stored
+
+        if value & 1:
+            break
+
+    if has_checksum:
+        f.seek(4, 1)
+        total += 4
+
+    return total, content_size, False
+
+
+def iter_zstd_frames(f):
+    # выдаёт (смещение, размер, размер содержимого, пропускаемый) для каждого кадра
+    end = f.seek(0, 2)
+    f.seek(0)
+    offset = 0
+
+    while offset < end:
+        frame = read_zstd_frame(f)
+
+        if frame is None:
+            break
+
+        size, content_size, skippable = frame
+
+        if offset + size > end:
+            raise StreamFormatError("Кадр zstd выходит за конец файла")
+
+        yield offset, size, content_size, skippable
+        offset += size
+
+
+def find_bz2_streams(f, chunk_size: int = 1024 * 1024) -> list:
+    # смещения начал потоков bz2 в склейке (как у pbzip2); внутри сжатых данных
+    # сигнатура может совпасть случайно, поэтому вызывающий должен уметь
+    # откатиться на последовательную распаковку
+    overlap = 9
+    offsets = []
+    base = 0
+    tail = b""
+    f.seek(0)
+
+    while True:
+        chunk = f.read(chunk_size)
+
+        if not chunk:
+            break
+
+        window = tail + chunk
+        start = base - len(tail)
+
+        for match in BZ2_STREAM_START.finditer(window):
+            offset = start + match.start()
+
+            if not offsets or offset > offsets[-1]:
+                offsets.append(offset)
+
+        tail = window[-overlap:]
+        base += len(chunk)
+
+    return offsets
+
+
+def merge_segments(segments, min_size: int) -> list:
+    # склеивает соседние сегменты (смещение, размер) до min_size, чтобы мелкие
+    # кадры не превращались в отдельные задачи
+    merged = []
+
+    for offset, size in segments:
+
+        if merged and merged[-1][1] < min_size and sum(merged[-1]) == offset:
+            merged[-1] = (merged[-1][0], merged[-1][1] + size)
+
+        else:
+            merged.append((offset, size))
+
+    return merged
+
+
+def build_seek_table(entries) -> bytes:
+    # entries: (сжатый размер, исходный размер) каждого кадра по порядку
+    body = b"".join(_SEEK_ENTRY.pack(stored, raw) for stored, raw in entries)
+    body += _SEEK_FOOTER.pack(len(entries), 0, ZSTD_SEEKABLE_MAGIC)
+    return _SKIPPABLE_HEADER.pack(ZSTD_SEEK_TABLE_MAGIC, len(body)) + body
+
+
+def read_seek_table(f):
+    # список (сжатый размер, исходный размер) или None, если таблицы нет
+    end = f.seek(0, 2)
+
+    if end < _SKIPPABLE_HEADER.size + _SEEK_FOOTER.size:
+        return None
+
+    f.seek(end - _SEEK_FOOTER.size)
+    count, descriptor, magic = _SEEK_FOOTER.unpack(f.read(_SEEK_FOOTER.size))
+
+    if magic != ZSTD_SEEKABLE_MAGIC:
+        return None
+
+    # контрольные суммы кадров необязательны и здесь не проверяются
+    entry_size = 12 if descriptor & ZSTD_SEEK_CHECKSUM_FLAG else 8
+    table_size = count * entry_size + _SEEK_FOOTER.size
+    start = end - table_size - _SKIPPABLE_HEADER.size
+
+    if start < 0:
+        raise StreamFormatError("Повреждённая таблица поиска zstd")
+
+    f.seek(start)
+    magic, size = _SKIPPABLE_HEADER.unpack(f.read(_SKIPPABLE_HEADER.size))
+
+    if magic != ZSTD_SEEK_TABLE_MAGIC or size != table_size:
+        raise StreamFormatError("Повреждённая таблица поиска zstd")
+
+    raw = f.read(count * entry_size)
+    return [_SEEK_ENTRY.unpack_from(raw, i * entry_size) for i in range(count)]
+
+
+def read_zstd_range(f, entries, offset: int, length: int, decompress) -> bytes:
+    return b"".join(iter_zstd_range(f, entries, offset, length, decompress))
+
+
+def iter_zstd_range(f, entries, offset: int, length: int, decompress):
+    # распаковываются только кадры, покрывающие [offset, offset + length);
+    # куски выдаются по кадру, чтобы длинный диапазон не держать в памяти
+    raw_starts = list(accumulate((raw for _, raw in entries), initial=0))
+    stored_starts = list(accumulate((stored for stored, _ in entries), initial=0))
+    end = min(offset + length, raw_starts[-1])
+
+    if offset >= end:
+        return
+
+    i = bisect_right(raw_starts, offset) - 1
+
+    while raw_starts[i] < end:
+        stored, raw_size = entries[i]
+        f.seek(stored_starts[i])
+        raw = decompress(f.read(stored))
+
+        if len(raw) != raw_size:
+            raise StreamFormatError("Размер кадра не совпадает с таблицей поиска")
+
+        start = max(offset - raw_starts[i], 0)
+        stop = min(end - raw_starts[i], raw_size)
+        yield raw[start:stop]
+        i += 1
+
+
+def zstd_segments(f) -> list:
+    # обычные кадры как (смещение, размер); пропускаемые кадры не распаковываются
+    entries = read_seek_table(f)
+
+    if entries is not None:
+        offsets = accumulate((stored for stored, _ in entries), initial=0)
+        return [(offset, stored) for offset, (stored, _) in zip(offsets, entries)]
+
+    return [
+        (offset, size)
+        for offset, size, _, skippable in iter_zstd_frames(f)
+        if not skippable
+    ]
+
+
+def bz2_segments(f) -> list:
+    offsets = find_bz2_streams(f)
+    end = f.seek(0, 2)
+
+    if not offsets or offsets[0] != 0:
+        raise StreamFormatError("Файл не начинается с потока bz2")
+
+    return [(start, stop - start) for start, stop in zip(offsets, offsets[1:] + [end])]
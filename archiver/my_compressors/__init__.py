@@ -3,6 +3,7 @@ from .zstd_compressor import ZstdCompressor
 from .bz2_compressor import Bz2Compressor
 from .stdlib_zstd import StdLibZstdCompressor
 from .stdlib_bz2 import StdLibBz2Compressor
+from .native_compressor import NativeCompressor, LzhCompressor, BwhCompressor
 
 __all__ = [
     "BaseCompressor",
@@ -10,4 +11,7 @@ __all__ = [
     "Bz2Compressor",
     "StdLibZstdCompressor",
     "StdLibBz2Compressor",
+    "NativeCompressor",
+    "LzhCompressor",
+    "BwhCompressor",
 ]
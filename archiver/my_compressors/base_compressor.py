@@ -1,12 +1,31 @@
 
 
 from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from functools import partial
 from pathlib import Path
+import asyncio
+import io
+import shutil
+import stat
 import tarfile
+import tempfile
+import threading
 import os
+from ..utils.aio import is_path, pipe_async, stream_size
+from ..utils.manifest import DirectoryManifest
+from ..utils.parallel import ordered_map
 
 class BaseCompressor(ABC):
-    
+
+    # упреждающее чтение мелких файлов при архивации директорий: файлы
+    # читаются пачками до PREFETCH_BATCH_SIZE байт или PREFETCH_BATCH_FILES
+    # файлов, в памяти не больше PREFETCH_IN_FLIGHT пачек
+    PREFETCH_THREADS = 8
+    PREFETCH_MAX_SIZE = 256 * 1024
+    PREFETCH_BATCH_SIZE = 1024 * 1024
+    PREFETCH_BATCH_FILES = 256
+    PREFETCH_IN_FLIGHT = 16
 
     def __init__(self):
         self.extension = ""
@@ -21,12 +40,88 @@ class BaseCompressor(ABC):
     def compress_data(self, data: bytes) -> bytes:
         pass
 
-    def compress(self, source: Path, destination: Path, progress_callback=None) -> None:
+    def compress_stream(
+        self, f_in, output_path: Path, total: int = 0, progress_callback=None
+    ) -> None:
+        # сжатие из потока (например, канала с tar); встроенные компрессоры
+        # переопределяют это, для остальных поток сохраняется во временный файл
+        with tempfile.NamedTemporaryFile(
+            dir=Path(output_path).parent, suffix=".tmp", delete=False
+        ) as tmp:
+            shutil.copyfileobj(f_in, tmp, 1024 * 1024)
+
+        try:
+            self.compress_file(Path(tmp.name), output_path, progress_callback)
+
+        finally:
+            os.unlink(tmp.name)
+
+    def open_encoder(self):
+        # пошаговое сжатие: compress(chunk) -> bytes, flush() -> bytes в конце.
+        # По умолчанию вход копится и сжимается целиком через compress_data
+        return _BufferedEncoder(self.compress_data)
+
+    async def compress_async(
+        self, source, destination, progress_callback=None, executor=None
+    ) -> None:
+        # пути - обычный compress целиком в executor (директории, потоки,
+        # seekable); потоки и файловые объекты - конвейер compress_stream_async
+        if is_path(source) and is_path(destination):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                executor, partial(self.compress, source, destination, progress_callback)
+            )
+            return
+
+        if is_path(source) and Path(source).is_dir():
+            raise ValueError("Директория сжимается только в файл по пути")
+
+        with ExitStack() as stack:
+            if is_path(source):
+                source = stack.enter_context(open(source, "rb"))
+            if is_path(destination):
+                destination = stack.enter_context(open(destination, "wb"))
+
+            await self.compress_stream_async(
+                source, destination, executor, progress_callback
+            )
+
+    async def compress_stream_async(
+        self, reader, writer, executor=None, progress_callback=None, total=None
+    ) -> None:
+        # reader/writer - StreamReader/StreamWriter, асинхронные или обычные
+        # файловые объекты; сжатие кусков идёт в executor, не блокируя цикл.
+        # total для прогресса - по умолчанию размер файла reader, если известен
+        encoder = self.open_encoder()
+        await pipe_async(
+            reader,
+            writer,
+            encoder.compress,
+            encoder.flush,
+            executor,
+            progress_callback=progress_callback,
+            total=stream_size(reader) if total is None else total,
+        )
+
+    def compress(
+        self,
+        source: Path,
+        destination: Path,
+        progress_callback=None,
+        manifest=None,
+        dedupe: bool = False,
+    ) -> None:
         source = Path(source)
         destination = Path(destination)
 
         if source.is_dir():
-            self._compress_directory(source, destination, progress_callback)
+
+            if manifest is None:
+                manifest = DirectoryManifest.scan(source, dedupe=dedupe)
+
+            self._compress_directory(
+                source, destination, progress_callback, manifest
+            )
 
         elif source.is_file():
             self.compress_file(source, destination, progress_callback)
@@ -35,34 +130,184 @@ class BaseCompressor(ABC):
             raise ValueError(f"Источник не существует: {source}")
 
     def _compress_directory(
-        self, dir_path: Path, output_path: Path, progress_callback=None
+        self, dir_path: Path, output_path: Path, progress_callback=None, manifest=None
     ) -> None:
-        tar_temp = output_path.with_suffix(".tar")
+        # tar пишется в канал отдельным потоком и сразу сжимается из него:
+        # один проход по данным, без промежуточного .tar на диске
+        if manifest is None:
+            manifest = DirectoryManifest.scan(dir_path)
 
-        try:
+        total_size = manifest.total_size
+        read_fd, write_fd = os.pipe()
+        errors = []
 
-            with tarfile.open(tar_temp, "w") as tar:
-                total_size = sum(
-                    f.stat().st_size for f in dir_path.rglob("*") if f.is_file()
+        def write_tar():
+            try:
+                with open(write_fd, "wb") as pipe_out:
+                    with tarfile.open(fileobj=pipe_out, mode="w|") as tar:
+                        for entry, data in self._prefetch_files(manifest):
+                            self._add_to_tar(tar, entry, data)
+
+            except BaseException as e:
+                errors.append(e)
+
+        writer = threading.Thread(target=write_tar, daemon=True)
+        writer.start()
+
+        try:
+            # закрытие чтения при ошибке сжатия обрывает запись tar (EPIPE)
+            with open(read_fd, "rb") as pipe_in:
+                self.compress_stream(
+                    pipe_in, output_path, total_size, progress_callback
                 )
-                processed = 0
 
-                for item in dir_path.rglob("*"):
+        finally:
+            writer.join()
 
-                    if item.is_file():
-                        arcname = item.relative_to(dir_path.parent)
-                        tar.add(item, arcname=arcname)
-                        processed += item.stat().st_size
+        if errors:
+            if output_path.exists():
+                output_path.unlink()
+            raise errors[0]
 
-                        if progress_callback and total_size > 0:
-                            progress_callback(processed, total_size)
+        if progress_callback:
+            progress_callback(total_size, total_size)
 
-            self.compress_file(tar_temp, output_path, progress_callback)
+    def _prefetch_files(self, manifest):
+        # содержимое мелких файлов читается заранее в пуле потоков, пока tar
+        # и компрессор обрабатывают предыдущие: открытие и чтение перестают
+        # быть последовательными. Крупные файлы (data=None) читаются потоком
+        def read_batch(batch):
+            result = []
 
-        finally:
+            for entry in batch:
+                if (
+                    entry.link
+                    or stat.S_ISLNK(entry.mode)
+                    or entry.size > self.PREFETCH_MAX_SIZE
+                ):
+                    result.append((entry, None))
+                    continue
 
-            if tar_temp.exists():
-                tar_temp.unlink()
+                with open(entry.path, "rb") as f:
+                    result.append((entry, f.read()))
+
+            return result
+
+        batches = self._batch_entries(manifest)
+
+        if self.PREFETCH_THREADS < 2:
+            results = map(read_batch, batches)
+
+        else:
+            results = ordered_map(
+                read_batch, batches, self.PREFETCH_THREADS, self.PREFETCH_IN_FLIGHT
+            )
+
+        for batch in results:
+            yield from batch
+
+    def _batch_entries(self, manifest):
+        # пачка на задачу вместо файла на задачу: накладные расходы пула не
+        # растут с числом мелких файлов
+        batch = []
+        batch_size = 0
+
+        for entry in manifest:
+            batch.append(entry)
+            batch_size += min(entry.size, self.PREFETCH_MAX_SIZE)
+
+            if (
+                batch_size >= self.PREFETCH_BATCH_SIZE
+                or len(batch) >= self.PREFETCH_BATCH_FILES
+            ):
+                yield batch
+                batch = []
+                batch_size = 0
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _add_to_tar(tar, entry, data: bytes = None) -> None:
+        # заголовок собирается из манифеста, без повторного lstat и поиска
+        # имён владельцев; символьные ссылки идут через обычный tar.add
+        if stat.S_ISLNK(entry.mode):
+            tar.add(entry.path, arcname=entry.arcname)
+            return
+
+        info = tarfile.TarInfo(entry.arcname)
+        info.size = entry.size
+        info.mtime = entry.mtime
+        info.mode = stat.S_IMODE(entry.mode)
+        info.uid = entry.uid
+        info.gid = entry.gid
+
+        if entry.link:
+            # дубликат содержимого: жёсткая ссылка на первую копию, без данных
+            info.type = tarfile.LNKTYPE
+            info.linkname = entry.link
+            info.size = 0
+            tar.addfile(info)
+            return
+
+        if data is not None:
+            # размер по фактически прочитанному, если файл успел измениться
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+            return
+
+        with open(entry.path, "rb") as f:
+            tar.addfile(info, f)
+
+    def _compress_blocks_parallel(
+        self,
+        f_in,
+        output_path: Path,
+        total: int,
+        block_size: int,
+        compress_block,
+        threads: int,
+        progress_callback=None,
+    ) -> list:
+        # вход режется на независимые блоки, блоки сжимаются в пуле потоков
+        # (zstd и bz2 отпускают GIL) и пишутся подряд в исходном порядке;
+        # возвращает (сжатый размер, исходный размер) каждого блока
+        def task(chunk):
+            return len(chunk), compress_block(chunk)
+
+        with open(output_path, "wb") as f_out:
+            chunks = iter(lambda: f_in.read(block_size), b"")
+            bytes_processed = 0
+            sizes = []
+
+            for size, packed in ordered_map(task, chunks, threads):
+                f_out.write(packed)
+                bytes_processed += size
+                sizes.append((len(packed), size))
+
+                if progress_callback:
+                    progress_callback(min(bytes_processed, total), total)
+
+            if bytes_processed == 0:
+                packed = compress_block(b"")
+                f_out.write(packed)
+                sizes.append((len(packed), 0))
+
+        return sizes
 
     def get_extension(self) -> str:
         return self.extension
+
+
+class _BufferedEncoder:
+    # для форматов без пошагового сжатия: весь вход в памяти до flush
+    def __init__(self, compress_data):
+        self._compress_data = compress_data
+        self._buffer = bytearray()
+
+    def compress(self, data: bytes) -> bytes:
+        self._buffer += data
+        return b""
+
+    def flush(self) -> bytes:
+        return self._compress_data(bytes(self._buffer))
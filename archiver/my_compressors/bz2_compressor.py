@@ -5,10 +5,13 @@ from .base_compressor import BaseCompressor
 
 class Bz2Compressor(BaseCompressor):
 
-    def __init__(self, level: int = 9):
+    def __init__(self, level: int = 9, threads: int = 1):
         super().__init__()
         self.extension = ".bz2"
         self.level = max(1, min(9, level))
+        self.threads = max(1, threads)
+        # как в pbzip2: блок равен блоку bzip2 этого уровня (100 КБ * уровень)
+        self.block_size = 100_000 * self.level
 
     def compress_data(self, data: bytes) -> bytes:
         if not data:
@@ -20,6 +23,9 @@ class Bz2Compressor(BaseCompressor):
         except Exception as e:
             raise RuntimeError(f"Ошибка при сжатии bz2: {e}")
 
+    def open_encoder(self):
+        return bz2.BZ2Compressor(self.level)
+
     def compress_file(
         self, input_path: Path, output_path: Path, progress_callback=None
     ) -> None:
@@ -32,25 +38,44 @@ class Bz2Compressor(BaseCompressor):
 
         try:
             with open(input_path, "rb") as f_in:
-                with bz2.open(
-                    str(output_path), "wb", compresslevel=self.level
-                ) as f_out:
-                    chunk_size = 65536
-                    bytes_processed = 0
-
-                    while True:
-                        chunk = f_in.read(chunk_size)
-                        if not chunk:
-                            break
-                        f_out.write(chunk)
-                        bytes_processed += len(chunk)
-
-                        if progress_callback:
-                            progress_callback(
-                                min(bytes_processed, file_size), file_size
-                            )
+                self.compress_stream(f_in, output_path, file_size, progress_callback)
         except Exception as e:
             raise RuntimeError(f"Ошибка при сжатии файла: {e}")
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def compress_stream(
+        self, f_in, output_path: Path, total: int = 0, progress_callback=None
+    ) -> None:
+        if self.threads > 1:
+            # каждый блок - отдельный поток bz2; bunzip2 читает их склейку
+            self._compress_blocks_parallel(
+                f_in,
+                output_path,
+                total,
+                self.block_size,
+                self._compress_block,
+                self.threads,
+                progress_callback,
+            )
+        else:
+            self._compress_file_stream(f_in, output_path, total, progress_callback)
+
+    def _compress_file_stream(self, f_in, output_path, total, progress_callback):
+        with bz2.open(str(output_path), "wb", compresslevel=self.level) as f_out:
+            chunk_size = 65536
+            bytes_processed = 0
+
+            while True:
+                chunk = f_in.read(chunk_size)
+                if not chunk:
+                    break
+                f_out.write(chunk)
+                bytes_processed += len(chunk)
+
+                if progress_callback:
+                    progress_callback(min(bytes_processed, total), total)
+
+    def _compress_block(self, chunk: bytes) -> bytes:
+        return bz2.compress(chunk, compresslevel=self.level)
@@ -0,0 +1,147 @@
+from abc import abstractmethod
+from pathlib import Path
+import io
+from .base_compressor import BaseCompressor
+from ..algorithms.pipelines import compress_bwh_block, compress_lzh_block
+from ..formats.native import (
+    BLOCK_STORED,
+    BWH_MAGIC,
+    LZH_MAGIC,
+    write_block,
+    write_file_header,
+)
+from ..utils.entropy import is_incompressible
+
+
+class NativeCompressor(BaseCompressor):
+
+    MAGIC = b""
+
+    def __init__(self, level: int = 9, block_size: int = 256 * 1024):
+        super().__init__()
+        self.level = max(1, min(9, level))
+        self.block_size = block_size
+
+    @abstractmethod
+    def compress_block(self, data: bytes) -> bytes:
+        pass
+
+    def compress_data(self, data: bytes) -> bytes:
+        if not data:
+            return b""
+
+        output = io.BytesIO()
+        self._compress_stream(io.BytesIO(data), output, len(data))
+        return output.getvalue()
+
+    def open_encoder(self):
+        return _NativeEncoder(self)
+
+    def compress_file(
+        self, input_path: Path, output_path: Path, progress_callback=None
+    ) -> None:
+        input_path = Path(input_path)
+        output_path = Path(output_path)
+        file_size = input_path.stat().st_size
+
+        if progress_callback:
+            progress_callback(0, file_size)
+
+        try:
+            with open(input_path, "rb") as f_in:
+                self.compress_stream(f_in, output_path, file_size, progress_callback)
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при сжатии файла: {e}")
+
+        if progress_callback:
+            progress_callback(file_size, file_size)
+
+    def compress_stream(
+        self, f_in, output_path: Path, total: int = 0, progress_callback=None
+    ) -> None:
+        with open(output_path, "wb") as f_out:
+            self._compress_stream(f_in, f_out, total, progress_callback)
+
+    def _compress_stream(self, f_in, f_out, total: int, progress_callback=None):
+        write_file_header(f_out, self.MAGIC, self.block_size)
+        bytes_processed = 0
+
+        while True:
+            block = f_in.read(self.block_size)
+            if not block:
+                break
+            write_block(f_out, block, *self._pack_block(block))
+            bytes_processed += len(block)
+
+            if progress_callback:
+                progress_callback(min(bytes_processed, total), total)
+
+    def _pack_block(self, block: bytes):
+        # несжимаемый по выборкам блок хранится как есть, не тратя время на
+        # сжатие; как есть хранится и блок, который сжатие не уменьшило
+        if is_incompressible(block):
+            return block, BLOCK_STORED
+
+        payload = self.compress_block(block)
+
+        if len(payload) >= len(block):
+            return block, BLOCK_STORED
+
+        return payload, 0
+
+
+class _NativeEncoder:
+    # пошаговая запись контейнера: заголовок, затем блоки по block_size по
+    # мере поступления данных, остаток - в flush
+    def __init__(self, compressor: NativeCompressor):
+        self._compressor = compressor
+        self._buffer = bytearray()
+        self._header_written = False
+
+    def compress(self, data: bytes) -> bytes:
+        self._buffer += data
+        return self._write_blocks(final=False)
+
+    def flush(self) -> bytes:
+        return self._write_blocks(final=True)
+
+    def _write_blocks(self, final: bool) -> bytes:
+        output = io.BytesIO()
+        block_size = self._compressor.block_size
+
+        if not self._header_written:
+            write_file_header(output, self._compressor.MAGIC, block_size)
+            self._header_written = True
+
+        while len(self._buffer) >= block_size or (final and self._buffer):
+            block = bytes(self._buffer[:block_size])
+            del self._buffer[:block_size]
+            write_block(output, block, *self._compressor._pack_block(block))
+
+        return output.getvalue()
+
+
+class LzhCompressor(NativeCompressor):
+
+    MAGIC = LZH_MAGIC
+
+    def __init__(self, level: int = 9):
+        super().__init__(level=level, block_size=256 * 1024)
+        self.extension = ".lzh"
+
+    def compress_block(self, data: bytes) -> bytes:
+        return compress_lzh_block(data, self.level)
+
+
+class BwhCompressor(NativeCompressor):
+
+    MAGIC = BWH_MAGIC
+
+    def __init__(self, level: int = 9):
+        # как в bzip2: уровень задаёт размер блока BWT в сотнях килобайт
+        level = max(1, min(9, level))
+        super().__init__(level=level, block_size=100_000 * level)
+        self.extension = ".bwh"
+
+    def compress_block(self, data: bytes) -> bytes:
+        return compress_bwh_block(data)
@@ -5,10 +5,12 @@ from .base_compressor import BaseCompressor
 
 class StdLibBz2Compressor(BaseCompressor):
 
-    def __init__(self, level: int = 9):
+    def __init__(self, level: int = 9, threads: int = 1):
         super().__init__()
         self.extension = ".bz2"
         self.level = max(1, min(9, level))
+        self.threads = max(1, threads)
+        self.block_size = 100_000 * self.level
 
     def compress_data(self, data: bytes) -> bytes:
 
@@ -17,28 +19,51 @@ class StdLibBz2Compressor(BaseCompressor):
 
         return bz2.compress(data, compresslevel=self.level)
 
+    def open_encoder(self):
+        return bz2.BZ2Compressor(self.level)
+
     def compress_file(
         self, input_path: Path, output_path: Path, progress_callback=None
     ) -> None:
         input_path = Path(input_path)
         output_path = Path(output_path)
         file_size = input_path.stat().st_size
-        processed = 0
 
         if progress_callback:
             progress_callback(0, file_size)
 
-        with open(input_path, "rb") as src, bz2.open(
-            output_path, "wb", compresslevel=self.level
-        ) as dst:
-            while True:
-                chunk = src.read(1024 * 1024)
-                if not chunk:
-                    break
-                dst.write(chunk)
-                processed += len(chunk)
-                if progress_callback and file_size > 0:
-                    progress_callback(processed, file_size)
+        with open(input_path, "rb") as src:
+            self.compress_stream(src, output_path, file_size, progress_callback)
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def compress_stream(
+        self, f_in, output_path: Path, total: int = 0, progress_callback=None
+    ) -> None:
+        processed = 0
+
+        if self.threads > 1:
+            self._compress_blocks_parallel(
+                f_in,
+                output_path,
+                total,
+                self.block_size,
+                self._compress_block,
+                self.threads,
+                progress_callback,
+            )
+
+        else:
+            with bz2.open(output_path, "wb", compresslevel=self.level) as dst:
+                while True:
+                    chunk = f_in.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    processed += len(chunk)
+                    if progress_callback and total > 0:
+                        progress_callback(min(processed, total), total)
+
+    def _compress_block(self, chunk: bytes) -> bytes:
+        return bz2.compress(chunk, compresslevel=self.level)
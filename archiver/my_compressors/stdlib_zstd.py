@@ -17,28 +17,36 @@ class StdLibZstdCompressor(BaseCompressor):
 
         return zstd.compress(data, level=self.level)
 
+    def open_encoder(self):
+        return zstd.ZstdCompressor(level=self.level)
+
     def compress_file(
         self, input_path: Path, output_path: Path, progress_callback=None
     ) -> None:
         input_path = Path(input_path)
         output_path = Path(output_path)
         file_size = input_path.stat().st_size
-        processed = 0
 
         if progress_callback:
             progress_callback(0, file_size)
 
-        with open(input_path, "rb") as src, zstd.open(
-            output_path, "wb", level=self.level
-        ) as dst:
+        with open(input_path, "rb") as src:
+            self.compress_stream(src, output_path, file_size, progress_callback)
+
+        if progress_callback:
+            progress_callback(file_size, file_size)
+
+    def compress_stream(
+        self, f_in, output_path: Path, total: int = 0, progress_callback=None
+    ) -> None:
+        processed = 0
+
+        with zstd.open(output_path, "wb", level=self.level) as dst:
             while True:
-                chunk = src.read(1024 * 1024)
+                chunk = f_in.read(1024 * 1024)
                 if not chunk:
                     break
                 dst.write(chunk)
                 processed += len(chunk)
-                if progress_callback and file_size > 0:
-                    progress_callback(processed, file_size)
-
-        if progress_callback:
-            progress_callback(file_size, file_size)
+                if progress_callback and total > 0:
+                    progress_callback(min(processed, total), total)
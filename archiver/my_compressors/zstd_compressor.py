@@ -1,14 +1,40 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import tarfile
 from compression import zstd
 from .base_compressor import BaseCompressor
+from ..formats.member_index import MemberEntry, build_member_index
+from ..formats.streams import build_seek_table
+from ..utils.entropy import is_incompressible
+from ..utils.manifest import DirectoryManifest
 
 
 class ZstdCompressor(BaseCompressor):
 
-    def __init__(self, level: int = 3):
+    # в индексированном архиве мелкие члены tar группируются в кадры
+    # примерно такого размера: извлечение одного члена распаковывает мало
+    MEMBER_GROUP_SIZE = 128 * 1024
+    # несжимаемые по выборкам куски сжимаются быстрым уровнем: zstd всё равно
+    # сохранит их сырыми блоками, а медленный уровень потратит время впустую
+    INCOMPRESSIBLE_LEVEL = 1
+    SAMPLE_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        level: int = 3,
+        threads: int = 1,
+        frame_size: int = 4 * 1024 * 1024,
+        seekable: bool = False,
+        indexed: bool = False,
+    ):
         super().__init__()
         self.extension = ".zst"
         self.level = max(1, min(22, level))
+        self.threads = max(1, threads)
+        self.frame_size = frame_size
+        self.seekable = seekable
+        self.indexed = indexed
 
     def compress_data(self, data: bytes) -> bytes:
         if not data:
@@ -20,6 +46,10 @@ class ZstdCompressor(BaseCompressor):
         except Exception as e:
             raise RuntimeError(f"Ошибка при сжатии zstd: {e}")
 
+    def open_encoder(self):
+        # один кадр zstd; flush() по умолчанию закрывает кадр
+        return zstd.ZstdCompressor(level=self.level)
+
     def compress_file(self, input_path: Path, output_path: Path, progress_callback=None) -> None:
         input_path = Path(input_path)
         output_path = Path(output_path)
@@ -30,21 +60,212 @@ class ZstdCompressor(BaseCompressor):
 
         try:
             with open(input_path, "rb") as f_in:
-                with zstd.open(str(output_path), "wb", level=self.level) as f_out:
-                    chunk_size = 65536
-                    bytes_processed = 0
-                    
-                    while True:
-                        chunk = f_in.read(chunk_size)
-                        if not chunk:
-                            break
-                        f_out.write(chunk)
-                        bytes_processed += len(chunk)
-                        
-                        if progress_callback:
-                            progress_callback(min(bytes_processed, file_size), file_size)
+                self.compress_stream(f_in, output_path, file_size, progress_callback)
         except Exception as e:
             raise RuntimeError(f"Ошибка при сжатии файла: {e}")
 
         if progress_callback:
             progress_callback(file_size, file_size)
+
+    def compress_stream(
+        self, f_in, output_path: Path, total: int = 0, progress_callback=None
+    ) -> None:
+        if self.seekable or self.indexed:
+            # кадры по frame_size и таблица поиска в конце: чтение диапазона
+            # распаковывает только покрывающие его кадры
+            sizes = self._compress_blocks_parallel(
+                f_in,
+                output_path,
+                total,
+                self.frame_size,
+                self._compress_frame,
+                self.threads,
+                progress_callback,
+            )
+
+            with open(output_path, "ab") as f_out:
+                f_out.write(build_seek_table(sizes))
+
+        elif self.threads > 1:
+            # независимые кадры по frame_size: обычный многокадровый .zst
+            self._compress_blocks_parallel(
+                f_in,
+                output_path,
+                total,
+                self.frame_size,
+                self._compress_frame,
+                self.threads,
+                progress_callback,
+            )
+        else:
+            self._compress_file_stream(f_in, output_path, total, progress_callback)
+
+    def _compress_file_stream(self, f_in, output_path, total, progress_callback):
+        # сжимаемые куски идут в один кадр; несжимаемый кусок закрывает текущий
+        # кадр и пишется отдельным кадром быстрого уровня - обычный zstd читает
+        # такую склейку кадров как один поток
+        compressor = zstd.ZstdCompressor(level=self.level)
+        bytes_processed = 0
+        in_frame = False
+
+        with open(output_path, "wb") as f_out:
+            for chunk in iter(lambda: f_in.read(self.SAMPLE_CHUNK_SIZE), b""):
+
+                if self._fast_level(chunk):
+
+                    if in_frame:
+                        f_out.write(compressor.flush())
+                        in_frame = False
+
+                    f_out.write(zstd.compress(chunk, level=self.INCOMPRESSIBLE_LEVEL))
+
+                else:
+                    f_out.write(compressor.compress(chunk))
+                    in_frame = True
+
+                bytes_processed += len(chunk)
+
+                if progress_callback:
+                    progress_callback(min(bytes_processed, total), total)
+
+            if in_frame or bytes_processed == 0:
+                f_out.write(compressor.flush())
+
+    def _compress_frame(self, chunk: bytes) -> bytes:
+        level = self.INCOMPRESSIBLE_LEVEL if self._fast_level(chunk) else self.level
+        return zstd.compress(chunk, level=level)
+
+    def _fast_level(self, chunk: bytes) -> bool:
+        return self.level > self.INCOMPRESSIBLE_LEVEL and is_incompressible(chunk)
+
+    def _compress_directory(
+        self, dir_path: Path, output_path: Path, progress_callback=None, manifest=None
+    ) -> None:
+        if not self.indexed:
+            super()._compress_directory(
+                dir_path, output_path, progress_callback, manifest
+            )
+            return
+
+        # несплошной режим: кадры режутся по границам членов tar, в конце -
+        # индекс членов и таблица поиска; архив остаётся обычным .tar.zst
+        if manifest is None:
+            manifest = DirectoryManifest.scan(dir_path)
+
+        total = manifest.total_size
+        members = []
+
+        try:
+            with open(output_path, "wb") as f_out:
+                writer = _FrameWriter(
+                    f_out,
+                    self._compress_frame,
+                    self.frame_size,
+                    self.MEMBER_GROUP_SIZE,
+                    self.threads,
+                )
+
+                try:
+                    with tarfile.open(fileobj=writer, mode="w") as tar:
+                        for entry, data in self._prefetch_files(manifest):
+                            start = writer.tell()
+                            self._add_to_tar(tar, entry, data)
+                            members.append(
+                                MemberEntry(
+                                    entry.arcname,
+                                    entry.size,
+                                    entry.mtime,
+                                    entry.mode,
+                                    start,
+                                    writer.tell() - start,
+                                )
+                            )
+                            writer.end_member()
+
+                            if progress_callback:
+                                progress_callback(min(writer.tell(), total), total)
+
+                    writer.finish()
+
+                except BaseException:
+                    writer.abort()
+                    raise
+
+                f_out.write(build_member_index(members))
+                f_out.write(build_seek_table(writer.frames))
+
+        except Exception as e:
+            # без индекса и таблицы поиска архив неполный - как в базовом классе
+            output_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Ошибка при сжатии файла: {e}")
+
+        if progress_callback:
+            progress_callback(total, total)
+
+
+class _FrameWriter:
+    # файловый объект для tarfile: режет поток на независимые кадры по
+    # frame_size и по границам членов (end_member), сжимает их по порядку,
+    # при threads > 1 - в пуле потоков
+    def __init__(self, f_out, compress_frame, frame_size, group_size, threads):
+        self.f_out = f_out
+        self.compress_frame = compress_frame
+        self.frame_size = frame_size
+        self.group_size = group_size
+        self.frames = []
+        self.position = 0
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._max_pending = threads * 2
+        self._pool = ThreadPoolExecutor(threads) if threads > 1 else None
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.position += len(data)
+
+        while len(self._buffer) >= self.frame_size:
+            self._submit(bytes(self._buffer[: self.frame_size]))
+            del self._buffer[: self.frame_size]
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def end_member(self) -> None:
+        if len(self._buffer) >= self.group_size:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+
+    def finish(self) -> None:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+
+        while self._pending:
+            self._write_next()
+
+        if self._pool:
+            self._pool.shutdown()
+
+    def abort(self) -> None:
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+
+    def _submit(self, raw: bytes) -> None:
+        if self._pool is None:
+            self._write(len(raw), self.compress_frame(raw))
+            return
+
+        self._pending.append((len(raw), self._pool.submit(self.compress_frame, raw)))
+
+        if len(self._pending) >= self._max_pending:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        raw_size, future = self._pending.popleft()
+        self._write(raw_size, future.result())
+
+    def _write(self, raw_size: int, frame: bytes) -> None:
+        self.f_out.write(frame)
+        self.frames.append((len(frame), raw_size))
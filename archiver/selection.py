@@ -0,0 +1,173 @@
+import stat
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .utils.manifest import DirectoryManifest
+
+# кандидаты автовыбора: (расширение, уровень) в пределах уровней CLI
+DEFAULT_CANDIDATES = (
+    (".zst", 1),
+    (".zst", 3),
+    (".zst", 6),
+    (".zst", 9),
+    (".bz2", 1),
+    (".bz2", 9),
+)
+
+# выборка из входа: SAMPLE_SLICES кусков, равномерно по файлу или по файлам
+# директории, всего до SAMPLE_SIZE байт
+SAMPLE_SIZE = 1024 * 1024
+SAMPLE_SLICES = 8
+
+# быстрые кандидаты замеряются повторно (до MEASURE_RUNS раз, пока общее
+# время меньше MEASURE_TIME), берётся лучшее время
+MEASURE_RUNS = 5
+MEASURE_TIME = 0.05
+
+# без цели выбирается самый быстрый из тех, кто сжимает не более чем на
+# RATIO_TOLERANCE процентных пункта хуже лучшего
+RATIO_TOLERANCE = 1.0
+
+
+class CodecChoice(NamedTuple):
+    extension: str
+    level: int
+    # степень сжатия выборки в процентах (как в выводе compress) и МБ/с
+    ratio: float
+    speed: float
+
+
+def read_sample(
+    source: Union[str, Path], size: int = SAMPLE_SIZE, manifest=None
+) -> bytes:
+    source = Path(source)
+
+    if source.is_file():
+        with open(source, "rb") as f:
+            return _read_slices(f, source.stat().st_size, size, SAMPLE_SLICES)
+
+    if manifest is None:
+        manifest = DirectoryManifest.scan(source)
+
+    files = [
+        entry
+        for entry in manifest
+        if stat.S_ISREG(entry.mode) and entry.size and not entry.link
+    ]
+
+    if not files:
+        return b""
+
+    # куски берутся равномерно по байтам всех файлов подряд (как в tar),
+    # а не по одному на файл: крупные файлы весят по своему размеру
+    offsets = list(accumulate(entry.size for entry in files))
+    total = offsets[-1]
+    count = SAMPLE_SLICES * 8
+    piece = max(size // count, 4096)
+
+    if total <= size:
+        return b"".join(Path(entry.path).read_bytes() for entry in files)[:size]
+
+    sample = bytearray()
+
+    for i in range(count):
+        position = i * total // count
+        index = bisect_right(offsets, position)
+        entry = files[index]
+
+        with open(entry.path, "rb") as f:
+            f.seek(position - (offsets[index] - entry.size))
+            sample += f.read(piece)
+
+    return bytes(sample[:size])
+
+
+def _read_slices(f, total: int, size: int, slices: int) -> bytes:
+    if total <= size:
+        return f.read()
+
+    piece = size // slices
+    step = (total - piece) // max(slices - 1, 1)
+    sample = bytearray()
+
+    for i in range(slices):
+        f.seek(i * step)
+        sample += f.read(piece)
+
+    return bytes(sample)
+
+
+def measure_candidates(
+    sample: bytes,
+    make_compressor: Callable,
+    candidates: Sequence[Tuple[str, int]] = DEFAULT_CANDIDATES,
+) -> list:
+    # пробное сжатие выборки каждым кандидатом; make_compressor(ext, level)
+    results = []
+
+    for extension, level in candidates:
+        compressor = make_compressor(extension, level)
+        timings = []
+
+        while len(timings) < MEASURE_RUNS and sum(timings) < MEASURE_TIME:
+            start = time.perf_counter()
+            packed = compressor.compress_data(sample)
+            timings.append(time.perf_counter() - start)
+
+        elapsed = max(min(timings), 1e-9)
+
+        results.append(
+            CodecChoice(
+                extension,
+                level,
+                (1 - len(packed) / len(sample)) * 100,
+                len(sample) / elapsed / (1024 * 1024),
+            )
+        )
+
+    return results
+
+
+def pick_codec(
+    results: list, min_speed: Optional[float] = None, min_ratio: Optional[float] = None
+) -> CodecChoice:
+    # min_speed: лучшее сжатие не медленнее min_speed МБ/с;
+    # min_ratio: самый быстрый со степенью сжатия не ниже min_ratio %.
+    # Если цель недостижима - ближайший к ней кандидат
+    if min_speed is not None and min_ratio is not None:
+        raise ValueError("Укажите одну цель: скорость или степень сжатия")
+
+    if min_speed is not None:
+        fit = [r for r in results if r.speed >= min_speed]
+        if not fit:
+            return max(results, key=lambda r: r.speed)
+        return max(fit, key=lambda r: r.ratio)
+
+    if min_ratio is not None:
+        fit = [r for r in results if r.ratio >= min_ratio]
+        if not fit:
+            return max(results, key=lambda r: r.ratio)
+        return max(fit, key=lambda r: r.speed)
+
+    best = max(r.ratio for r in results)
+    fit = [r for r in results if r.ratio >= best - RATIO_TOLERANCE]
+    return max(fit, key=lambda r: r.speed)
+
+
+def select_codec(
+    sample: bytes,
+    make_compressor: Callable,
+    min_speed: Optional[float] = None,
+    min_ratio: Optional[float] = None,
+    candidates: Sequence[Tuple[str, int]] = DEFAULT_CANDIDATES,
+) -> CodecChoice:
+
+    if not sample:
+        extension, level = candidates[0]
+        return CodecChoice(extension, level, 0.0, 0.0)
+
+    results = measure_candidates(sample, make_compressor, candidates)
+    return pick_codec(results, min_speed, min_ratio)
@@ -1,4 +1,22 @@
 from .progress_bar import ProgressBar
 from .benchmark import benchmark
+from .parallel import ordered_map
+from .iostream import IterReader, open_chunks
+from .manifest import DirectoryManifest, FileEntry
+from .entropy import is_incompressible, sample_ratio
+from .aio import pipe_async, read_async, write_async
 
-__all__ = ["ProgressBar", "benchmark"]
+__all__ = [
+    "ProgressBar",
+    "benchmark",
+    "ordered_map",
+    "IterReader",
+    "open_chunks",
+    "DirectoryManifest",
+    "FileEntry",
+    "is_incompressible",
+    "sample_ratio",
+    "pipe_async",
+    "read_async",
+    "write_async",
+]
@@ -0,0 +1,106 @@
+import asyncio
+import io
+import os
+import stat
+
+CHUNK_SIZE = 1024 * 1024
+# сколько кусков может ждать между чтением, обработкой и записью: память на
+# задачу ограничена, а медленный получатель притормаживает чтение
+MAX_PENDING = 2
+
+
+def is_path(obj) -> bool:
+    return isinstance(obj, (str, os.PathLike))
+
+
+def stream_size(reader) -> int:
+    # размер входа для прогресса: у обычного файла - из fstat, у остальных
+    # потоков (StreamReader, каналы, сокеты) неизвестен - 0
+    try:
+        info = os.fstat(reader.fileno())
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+    return info.st_size if stat.S_ISREG(info.st_mode) else 0
+
+
+async def read_async(reader, size: int, executor=None) -> bytes:
+    # обычный файл читается в executor, асинхронный (StreamReader, aiofiles)
+    # ожидается напрямую
+    if isinstance(reader, io.IOBase):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, reader.read, size)
+
+    data = reader.read(size)
+    return await data if asyncio.iscoroutine(data) else data
+
+
+async def write_async(writer, data: bytes, executor=None) -> None:
+    if isinstance(writer, io.IOBase):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, writer.write, data)
+        return
+
+    result = writer.write(data)
+
+    if asyncio.iscoroutine(result):
+        await result
+
+    # StreamWriter: ждать, пока буфер транспорта не разгрузится
+    if hasattr(writer, "drain"):
+        await writer.drain()
+
+
+async def pipe_async(
+    reader,
+    writer,
+    transform,
+    finish,
+    executor=None,
+    chunk_size: int = CHUNK_SIZE,
+    max_pending: int = MAX_PENDING,
+    progress_callback=None,
+    total: int = 0,
+) -> None:
+    # чтение, обработка и запись идут параллельно через очереди по
+    # max_pending кусков. transform(chunk) и finish() - вызовы состояния
+    # кодека: выполняются в executor строго по очереди, цикл событий не ждёт
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue(max_pending)
+    results = asyncio.Queue(max_pending)
+
+    async def read():
+        while True:
+            chunk = await read_async(reader, chunk_size, executor)
+            await chunks.put(chunk)
+
+            if not chunk:
+                return
+
+    async def process():
+        processed = 0
+
+        while chunk := await chunks.get():
+            await results.put(await loop.run_in_executor(executor, transform, chunk))
+            processed += len(chunk)
+
+            if progress_callback:
+                progress_callback(processed, total)
+
+        await results.put(await loop.run_in_executor(executor, finish))
+        await results.put(None)
+
+    async def write():
+        while (data := await results.get()) is not None:
+            if data:
+                await write_async(writer, data, executor)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(read())
+            group.create_task(process())
+            group.create_task(write())
+
+    except ExceptionGroup as errors:
+        # наружу - исходная ошибка, как у синхронных compress/decompress
+        raise errors.exceptions[0] from None
@@ -0,0 +1,31 @@
+import zlib
+
+# сжимаемость блока оценивается быстрым zlib на нескольких выборках:
+# это доли процента от полного сжатия, а несжимаемые данные (медиа,
+# шифрованные и уже сжатые файлы) не тратят время медленных уровней
+SAMPLE_SIZE = 4096
+SAMPLE_COUNT = 8
+INCOMPRESSIBLE_RATIO = 0.97
+
+
+def sample_ratio(
+    data: bytes, sample_size: int = SAMPLE_SIZE, samples: int = SAMPLE_COUNT
+) -> float:
+    # доля, которую занимают сжатые выборки: около 1.0 - данные не сжимаются
+    if not data:
+        return 0.0
+
+    if len(data) <= sample_size * samples:
+        sample = data
+
+    else:
+        step = (len(data) - sample_size) // (samples - 1)
+        sample = b"".join(
+            data[i * step : i * step + sample_size] for i in range(samples)
+        )
+
+    return len(zlib.compress(sample, 1)) / len(sample)
+
+
+def is_incompressible(data: bytes, threshold: float = INCOMPRESSIBLE_RATIO) -> bool:
+    return sample_ratio(data) >= threshold
@@ -0,0 +1,41 @@
+import io
+from typing import Iterable
+
+
+class IterReader(io.RawIOBase):
+    # читаемый поток поверх итератора байтовых кусков (например, распакованных
+    # блоков); оборачивается в io.BufferedReader
+    def __init__(self, chunks: Iterable):
+        self._chunks = iter(chunks)
+        self._chunk = memoryview(b"")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+
+        while self._pos >= len(self._chunk):
+            chunk = next(self._chunks, None)
+
+            if chunk is None:
+                return 0
+
+            self._chunk = memoryview(chunk)
+            self._pos = 0
+
+        size = min(len(buffer), len(self._chunk) - self._pos)
+        buffer[:size] = self._chunk[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def close(self) -> None:
+        # генератор закрывается сразу, чтобы остановить пул распаковки
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
+
+        super().close()
+
+
+def open_chunks(chunks: Iterable, buffer_size: int = 1024 * 1024) -> io.BufferedReader:
+    return io.BufferedReader(IterReader(chunks), buffer_size)
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import stat
+from collections import defaultdict
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Union
+
+from .parallel import ordered_map
+
+
+class FileEntry(NamedTuple):
+    path: str
+    arcname: str
+    size: int
+    mtime: float
+    mode: int
+    uid: int
+    gid: int
+    # имя в архиве первой копии того же содержимого (дедупликация)
+    link: Optional[str] = None
+
+
+class DirectoryManifest:
+
+    HASH_THREADS = 8
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, root: Path, files: List[FileEntry]):
+        self.root = Path(root)
+        self.files = files
+        self.total_size = sum(entry.size for entry in files)
+
+    @property
+    def duplicates(self) -> List[FileEntry]:
+        return [entry for entry in self.files if entry.link]
+
+    @property
+    def duplicate_size(self) -> int:
+        return sum(entry.size for entry in self.files if entry.link)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self):
+        return iter(self.files)
+
+    @classmethod
+    def scan(cls, root: Union[str, Path], dedupe: bool = False) -> "DirectoryManifest":
+        # один обход os.scandir: stat каждого файла берётся ровно один раз и
+        # дальше служит и прогрессу, и заголовкам tar, и статистике. Имена в
+        # архиве - относительно родителя root, как раньше в tar.add
+        root = Path(root)
+        files = []
+        stack = [(str(root), root.name)]
+
+        while stack:
+            dir_path, dir_arcname = stack.pop()
+
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+
+            subdirs = []
+
+            for entry in entries:
+                arcname = f"{dir_arcname}/{entry.name}" if dir_arcname else entry.name
+
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, arcname))
+
+                elif entry.is_file():
+                    st = entry.stat(follow_symlinks=False)
+                    # у символьной ссылки в tar нет данных
+                    size = 0 if stat.S_ISLNK(st.st_mode) else st.st_size
+                    files.append(
+                        FileEntry(
+                            entry.path,
+                            arcname,
+                            size,
+                            st.st_mtime,
+                            st.st_mode,
+                            st.st_uid,
+                            st.st_gid,
+                        )
+                    )
+
+            stack.extend(reversed(subdirs))
+
+        manifest = cls(root, files)
+
+        if dedupe:
+            manifest.mark_duplicates()
+
+        return manifest
+
+    def mark_duplicates(self) -> None:
+        # хэшируются только файлы с совпадающим размером: файл уникального
+        # размера дубликатом быть не может. Повторная копия получает link на
+        # первую, в tar она станет жёсткой ссылкой без данных
+        by_size = defaultdict(list)
+
+        for i, entry in enumerate(self.files):
+            if entry.size > 0 and not stat.S_ISLNK(entry.mode):
+                by_size[entry.size].append(i)
+
+        candidates = [i for group in by_size.values() if len(group) > 1 for i in group]
+        digests = ordered_map(
+            lambda i: self._hash_file(self.files[i].path),
+            candidates,
+            self.HASH_THREADS,
+        )
+        first = {}
+
+        for i, digest in zip(candidates, digests):
+            key = (self.files[i].size, digest)
+
+            if key in first:
+                self.files[i] = self.files[i]._replace(link=first[key])
+            else:
+                first[key] = self.files[i].arcname
+
+    def _hash_file(self, path: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=32)
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(self.HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+
+        return digest.digest()
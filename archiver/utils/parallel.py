@@ -0,0 +1,27 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+
+def ordered_map(
+    func: Callable,
+    items: Iterable,
+    workers: int,
+    max_in_flight: int = None,
+    executor_class=ThreadPoolExecutor,
+) -> Iterator:
+    # как Executor.map, но вход читается лениво: одновременно в работе не больше
+    # max_in_flight задач, результаты выдаются строго в порядке входа
+    max_in_flight = max_in_flight or workers * 2
+
+    with executor_class(max_workers=workers) as pool:
+        pending = deque()
+
+        for item in items:
+            pending.append(pool.submit(func, item))
+
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
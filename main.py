@@ -2,9 +2,18 @@ import argparse
 import sys
 from pathlib import Path
 
+from archiver.batch import (
+    compress_job,
+    decompress_job,
+    default_workers,
+    expand_sources,
+    plan_outputs,
+    run_batch,
+)
 from archiver.factory import ArchiveFactory
 from archiver.utils.progress_bar import ProgressBar
 from archiver.utils.benchmark import Benchmark, format_time
+from archiver.utils.manifest import DirectoryManifest
 
 
 def compress_command(args):
@@ -16,9 +25,41 @@ def compress_command(args):
         print(f"Ошибка: Источник не существует: {source}", file=sys.stderr)
         sys.exit(1)
 
+    options = {}
+    if args.threads > 1:
+        options["threads"] = args.threads
+    if args.seekable:
+        options["seekable"] = True
+    if args.indexed:
+        options["indexed"] = True
+
+    # директория обходится один раз: манифест даёт и объём для прогресса,
+    # и список файлов для tar, и статистику
+    manifest = None
+    if source.is_file():
+        total_size = source.stat().st_size
+    else:
+        manifest = DirectoryManifest.scan(source, dedupe=args.dedupe)
+        total_size = manifest.total_size
+
+    level = args.level
+    choice = None
+
     try:
+        if args.auto or args.min_speed is not None or args.min_ratio is not None:
+            choice = ArchiveFactory.choose_codec(
+                source,
+                args.min_speed,
+                args.min_ratio,
+                manifest=manifest,
+                implementation=args.impl,
+                **options,
+            )
+            level = choice.level
+            output = _auto_output(output, choice.extension)
+
         compressor = ArchiveFactory.get_compressor(
-            output, level=args.level, implementation=args.impl
+            output, level=level, implementation=args.impl, **options
         )
     except ValueError as e:
         print(f"Ошибка: {e}", file=sys.stderr)
@@ -26,10 +67,6 @@ def compress_command(args):
 
     progress = None
     if args.progress:
-        if source.is_file():
-            total_size = source.stat().st_size
-        else:
-            total_size = sum(f.stat().st_size for f in source.rglob("*") if f.is_file())
         progress = ProgressBar(total=total_size, desc="Сжатие")
 
         def progress_callback(current, total):
@@ -46,16 +83,35 @@ def compress_command(args):
 
         print(f"Сжатие: {source} -> {output}")
         print(f"Формат: {output.suffix}")
-        print(f"Уровень сжатия: {args.level}")
+        print(f"Уровень сжатия: {level}")
+        if choice:
+            print(
+                f"Автовыбор: выборка сжата на {choice.ratio:.1f}%, "
+                f"{choice.speed:.1f} МБ/с"
+            )
         print(f"Реализация: {args.impl}")
-
-        compressor.compress(source, output, progress_callback)
+        if args.threads > 1:
+            print(f"Потоков: {args.threads}")
+        if args.seekable:
+            print("Таблица поиска: да")
+        if args.indexed:
+            print("Индекс файлов: да")
+
+        if manifest is not None:
+            print(f"Файлов: {len(manifest)}")
+            if args.dedupe:
+                print(
+                    f"Дубликатов: {len(manifest.duplicates)} "
+                    f"({_format_size(manifest.duplicate_size)} не сжимается повторно)"
+                )
+
+        compressor.compress(source, output, progress_callback, manifest=manifest)
 
         if bench:
             bench.stop()
 
         if output.exists():
-            original_size = source.stat().st_size if source.is_file() else total_size
+            original_size = total_size
             compressed_size = output.stat().st_size
             ratio = (
                 (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
@@ -77,6 +133,14 @@ def compress_command(args):
             progress.close()
 
 
+def _auto_output(output: Path, extension: str) -> Path:
+    # расширение архива заменяется выбранным, иначе добавляется к имени
+    if output.suffix.lower() in ArchiveFactory.supported_extensions():
+        return output.with_suffix(extension)
+
+    return output.with_name(output.name + extension)
+
+
 def decompress_command(args):
 
     source = Path(args.source)
@@ -86,12 +150,22 @@ def decompress_command(args):
         print(f"Ошибка: Архив не существует: {source}", file=sys.stderr)
         sys.exit(1)
 
+    options = {}
+    if args.threads > 1:
+        options["threads"] = args.threads
+
     try:
-        decompressor = ArchiveFactory.get_decompressor(source, implementation=args.impl)
+        decompressor = ArchiveFactory.get_decompressor(
+            source, implementation=args.impl, **options
+        )
     except ValueError as e:
         print(f"Ошибка: {e}", file=sys.stderr)
         sys.exit(1)
 
+    if args.member:
+        extract_member(decompressor, source, output, args.member)
+        return
+
     progress = None
     if args.progress:
         total_size = source.stat().st_size
@@ -113,6 +187,10 @@ def decompress_command(args):
         if output:
             print(f"Место: {output}")
         print(f"Реализация: {args.impl}")
+        if decompressor.get_extension() != source.suffix.lower():
+            print(f"Формат по сигнатуре: {decompressor.get_extension()}")
+        if args.threads > 1:
+            print(f"Потоков: {args.threads}")
 
         decompressor.decompress(source, output, progress_callback)
 
@@ -135,6 +213,168 @@ def decompress_command(args):
             progress.close()
 
 
+def extract_member(decompressor, source: Path, output: Path, name: str):
+
+    output = output if output else source.with_suffix("")
+
+    print(f"Распаковка: {source} [{name}]")
+    print(f"Место: {output}")
+
+    try:
+        count = decompressor.extract_member(source, name, output)
+    except Exception as e:
+        print(f"\n[ERROR] Ошибка при распаковке: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n[OK] Распаковано файлов: {count}")
+
+
+def list_command(args):
+
+    source = Path(args.source)
+
+    if not source.exists():
+        print(f"Ошибка: Архив не существует: {source}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        decompressor = ArchiveFactory.get_decompressor(source, implementation=args.impl)
+        members = decompressor.list_members(source)
+    except Exception as e:
+        print(f"[ERROR] Ошибка при чтении архива: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for member in members:
+        print(f"{_format_size(member.size):>12}  {member.name}")
+
+    total = sum(member.size for member in members)
+    print(f"Итого: {len(members)} записей, {_format_size(total)}")
+
+
+def extract_range_command(args):
+
+    source = Path(args.source)
+
+    if not source.exists():
+        print(f"Ошибка: Архив не существует: {source}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        decompressor = ArchiveFactory.get_decompressor(source, implementation=args.impl)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not hasattr(decompressor, "read_range"):
+        print(
+            f"Ошибка: Формат '{source.suffix}' не поддерживает чтение диапазона",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    try:
+        data = decompressor.read_range(source, args.offset, args.length)
+    except Exception as e:
+        print(f"[ERROR] Ошибка при чтении диапазона: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        Path(args.output).write_bytes(data)
+        print(f"[OK] Прочитано {_format_size(len(data))} -> {args.output}")
+    else:
+        sys.stdout.buffer.write(data)
+        sys.stdout.flush()
+
+
+def compress_many_command(args):
+
+    extension = args.format if args.format.startswith(".") else "." + args.format
+
+    def rename(source):
+        return source.with_name(source.name + extension)
+
+    def make_task(source, output):
+        return source, output, args.level, args.impl
+
+    _run_batch_command(
+        args, compress_job, rename, make_task, "Сжатие", raw_input=True
+    )
+
+
+def decompress_many_command(args):
+
+    def rename(source):
+        return source.with_suffix("")
+
+    def make_task(source, output):
+        return source, output, args.impl
+
+    _run_batch_command(
+        args, decompress_job, rename, make_task, "Распаковка", raw_input=False
+    )
+
+
+def _run_batch_command(args, job, rename, make_task, desc: str, raw_input: bool):
+    # raw_input: несжатые данные - на входе (сжатие) или на выходе (распаковка);
+    # по ним считается скорость
+
+    sources = expand_sources(args.sources, args.from_file)
+
+    if not sources:
+        print("Ошибка: Нет файлов для обработки", file=sys.stderr)
+        sys.exit(1)
+
+    planned, conflicts = plan_outputs(sources, rename, args.output_dir)
+
+    jobs = max(1, min(args.jobs, len(sources)))
+    print(f"{desc}: {len(sources)} файлов, процессов: {jobs}")
+
+    total_size = sum(source.stat().st_size for source in sources if source.is_file())
+    progress = ProgressBar(total=total_size, desc=desc) if args.progress else None
+    bench = Benchmark()
+    bench.start()
+    failures = list(conflicts)
+    input_size = 0
+    output_size = 0
+
+    for result in conflicts:
+        print(f"[FAIL] {result.source}: {result.error}", file=sys.stderr)
+
+    try:
+        tasks = (make_task(source, output) for source, output in planned)
+
+        for result in run_batch(job, tasks, jobs):
+
+            if result.error:
+                failures.append(result)
+                print(f"[FAIL] {result.source}: {result.error}", file=sys.stderr)
+
+            else:
+                input_size += result.input_size
+                output_size += result.output_size
+
+            if progress:
+                progress.update(min(input_size, total_size), total_size)
+
+    finally:
+        if progress:
+            progress.close()
+
+    elapsed = bench.stop()
+    raw_size = input_size if raw_input else output_size
+    speed = raw_size / elapsed / (1024 * 1024) if elapsed > 0 else 0
+
+    done = f"Обработано файлов: {len(sources) - len(failures)}/{len(sources)}"
+    print(f"\n[ERROR] {done}" if failures else f"\n[OK] {done}")
+    print(f"  Объём: {_format_size(input_size)} -> {_format_size(output_size)}")
+    print(f"  Время выполнения: {bench.format_elapsed()}")
+    print(f"  Скорость: {speed:.1f} МБ/с")
+
+    if failures:
+        print(f"  Ошибок: {len(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
 def list_formats_command(args):
 
     extensions = ArchiveFactory.supported_extensions()
@@ -152,6 +392,50 @@ def _format_size(size: int) -> str:
     return f"{size:.1f} ПБ"
 
 
+def _add_batch_arguments(parser):
+
+    parser.add_argument(
+        "sources",
+        type=str,
+        nargs="*",
+        help="Файлы или шаблоны glob (в кавычках, поддерживается **)",
+    )
+    parser.add_argument(
+        "--from",
+        dest="from_file",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Файл со списком путей, по одному в строке (- для stdin)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Директория для результатов с теми же поддиректориями "
+        "(по умолчанию: рядом с исходными)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_workers(),
+        metavar="N",
+        help="Число процессов (по умолчанию: число ядер)",
+    )
+    parser.add_argument(
+        "-p", "--progress", action="store_true", help="Показывать прогресс-бар"
+    )
+    parser.add_argument(
+        "--impl",
+        type=str,
+        choices=["custom", "stdlib"],
+        default="custom",
+        help="Выбор реализации алгоритма",
+    )
+
+
 def main():
 
     parser = argparse.ArgumentParser(
@@ -168,7 +452,7 @@ def main():
         "source", type=str, help="Путь к файлу или директории для сжатия"
     )
     compress_parser.add_argument(
-        "output", type=str, help="Путь к выходному архиву (.zst или .bz2)"
+        "output", type=str, help="Путь к выходному архиву (.zst, .bz2, .lzh или .bwh)"
     )
     compress_parser.add_argument(
         "-l",
@@ -195,6 +479,49 @@ def main():
         default="custom",
         help="Выбор реализации алгоритма",
     )
+    compress_parser.add_argument(
+        "-t",
+        "--threads",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Сжимать независимые блоки в N потоков (по умолчанию: 1)",
+    )
+    compress_parser.add_argument(
+        "--seekable",
+        action="store_true",
+        help="Формат zstd seekable: кадры и таблица поиска для extract-range",
+    )
+    compress_parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Хранить одинаковые файлы директории один раз (жёсткие ссылки tar)",
+    )
+    compress_parser.add_argument(
+        "--indexed",
+        action="store_true",
+        help="Индекс файлов .zst: list и распаковка одного файла без чтения архива",
+    )
+    compress_parser.add_argument(
+        "--auto",
+        action="store_true",
+        help="Выбрать формат и уровень по пробному сжатию выборки (заменяет -l)",
+    )
+    target = compress_parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--min-speed",
+        type=float,
+        default=None,
+        metavar="MBPS",
+        help="--auto с целью: лучшее сжатие не медленнее MBPS МБ/с",
+    )
+    target.add_argument(
+        "--min-ratio",
+        type=float,
+        default=None,
+        metavar="PCT",
+        help="--auto с целью: самый быстрый со степенью сжатия не ниже PCT %%",
+    )
     compress_parser.set_defaults(func=compress_command)
 
     decompress_parser = subparsers.add_parser(
@@ -226,8 +553,91 @@ def main():
         default="custom",
         help="Выбор реализации алгоритма",
     )
+    decompress_parser.add_argument(
+        "-t",
+        "--threads",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Распаковывать независимые кадры в N потоков (по умолчанию: 1)",
+    )
+    decompress_parser.add_argument(
+        "-m",
+        "--member",
+        type=str,
+        default=None,
+        metavar="NAME",
+        help="Распаковать только файл или директорию NAME из архива директории",
+    )
     decompress_parser.set_defaults(func=decompress_command)
 
+    range_parser = subparsers.add_parser(
+        "extract-range",
+        aliases=["range"],
+        help="Распаковать диапазон байт из .zst (быстро для --seekable)",
+    )
+    range_parser.add_argument("source", type=str, help="Путь к архиву")
+    range_parser.add_argument("offset", type=int, help="Смещение в исходных данных")
+    range_parser.add_argument("length", type=int, help="Число байт")
+    range_parser.add_argument(
+        "output",
+        type=str,
+        nargs="?",
+        default=None,
+        help="Файл для результата (по умолчанию: stdout)",
+    )
+    range_parser.add_argument(
+        "--impl",
+        type=str,
+        choices=["custom", "stdlib"],
+        default="custom",
+        help="Выбор реализации алгоритма",
+    )
+    range_parser.set_defaults(func=extract_range_command)
+
+    compress_many_parser = subparsers.add_parser(
+        "compress-many", aliases=["cm"], help="Сжать много файлов в пуле процессов"
+    )
+    _add_batch_arguments(compress_many_parser)
+    compress_many_parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        default=".zst",
+        help="Формат архивов: .zst, .bz2, .lzh или .bwh (по умолчанию: .zst)",
+    )
+    compress_many_parser.add_argument(
+        "-l",
+        "--level",
+        type=int,
+        default=9,
+        choices=range(1, 10),
+        metavar="LEVEL",
+        help="Уровень сжатия (1-9, по умолчанию: 9)",
+    )
+    compress_many_parser.set_defaults(func=compress_many_command)
+
+    decompress_many_parser = subparsers.add_parser(
+        "decompress-many",
+        aliases=["dm"],
+        help="Распаковать много архивов в пуле процессов",
+    )
+    _add_batch_arguments(decompress_many_parser)
+    decompress_many_parser.set_defaults(func=decompress_many_command)
+
+    members_parser = subparsers.add_parser(
+        "list", help="Показать содержимое архива директории"
+    )
+    members_parser.add_argument("source", type=str, help="Путь к архиву")
+    members_parser.add_argument(
+        "--impl",
+        type=str,
+        choices=["custom", "stdlib"],
+        default="custom",
+        help="Выбор реализации алгоритма",
+    )
+    members_parser.set_defaults(func=list_command)
+
     list_parser = subparsers.add_parser(
         "list-formats",
         aliases=["formats", "ls"],
@@ -3,6 +3,8 @@ import sys
 import time
 import random
 import string
+import shutil
+import io
 from pathlib import Path
 
 
@@ -212,6 +214,74 @@ def test_random_data():
     os.remove(test_file)
 
 
+def test_incompressible_blocks():
+    print_test("Несжимаемые блоки: хранение как есть и быстрый уровень")
+
+    from archiver.formats import BLOCK_STORED, iter_zstd_frames, read_blocks
+    from archiver.formats.native import read_file_header
+    from archiver.utils.entropy import is_incompressible
+
+    test_file = Path("test_incompressible.bin")
+    text = "".join(f"строка {i} текста\n" for i in range(20000)).encode("utf-8")
+    test_data = os.urandom(256 * 1024) + text[: 256 * 1024]
+    test_file.write_bytes(test_data)
+
+    try:
+        if is_incompressible(os.urandom(100000)) and not is_incompressible(text):
+            print_success("Оценка по выборкам различает случайные данные и текст")
+        else:
+            print_error("Оценка по выборкам ошиблась")
+
+        archive = Path("test_incompressible.lzh")
+        ArchiveFactory.get_compressor(archive).compress_file(test_file, archive)
+
+        with open(archive, "rb") as f:
+            read_file_header(f, b"LZH1")
+            flags = [block[0] & BLOCK_STORED for block in read_blocks(f)]
+
+        output = Path("test_incompressible_out.bin")
+        ArchiveFactory.get_decompressor(archive).decompress_file(archive, output)
+        restored = output.read_bytes() == test_data
+
+        if flags == [BLOCK_STORED, 0] and restored:
+            print_success(".lzh: случайный блок сохранён как есть, текст сжат")
+        else:
+            print_error(f".lzh: флаги блоков {flags}, восстановлено {restored}")
+
+        archive.unlink()
+        archive = Path("test_incompressible.zst")
+        comp = ArchiveFactory.get_compressor(archive, level=9)
+        # кусок, по которому zstd выбирает уровень, - SAMPLE_CHUNK_SIZE
+        chunk = comp.SAMPLE_CHUNK_SIZE
+        test_data = os.urandom(chunk) + (text * (chunk // len(text) + 1))[:chunk]
+        test_file.write_bytes(test_data)
+        comp.compress_file(test_file, archive)
+
+        with open(archive, "rb") as f:
+            frames = len(list(iter_zstd_frames(f)))
+
+        ArchiveFactory.get_decompressor(archive).decompress_file(archive, output)
+        restored = output.read_bytes() == test_data
+
+        if frames == 2 and restored:
+            print_success(".zst: случайные данные - отдельный кадр быстрого уровня")
+        else:
+            print_error(f".zst: кадров {frames}, восстановлено {restored}")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        for path in [
+            test_file,
+            Path("test_incompressible.lzh"),
+            Path("test_incompressible.zst"),
+            Path("test_incompressible_out.bin"),
+        ]:
+            if path.exists():
+                path.unlink()
+
+
 def test_mixed_content():
     print_test("Сжатие смешанного контента (текст + бинарные данные)")
 
@@ -447,6 +517,921 @@ def test_compression_levels():
     os.remove(test_file)
 
 
+def test_native_formats():
+    print_test("Собственные форматы (.lzh, .bwh)")
+
+    test_file = "test_native.bin"
+    text_part = ("Собственный формат архива. " * 200).encode("utf-8")
+    test_data = text_part + bytes(range(256)) * 4 + os.urandom(2000)
+
+    with open(test_file, "wb") as f:
+        f.write(test_data)
+
+    original_size = len(test_data)
+
+    for fmt in [".lzh", ".bwh"]:
+        for level in [1, 9]:
+            archive = f"test_native{fmt}"
+            try:
+                comp = ArchiveFactory.get_compressor(archive, level=level)
+                start = time.time()
+                comp.compress_file(test_file, archive)
+                comp_time = time.time() - start
+
+                archive_size = os.path.getsize(archive)
+                ratio = (1 - archive_size / original_size) * 100
+
+                decomp = ArchiveFactory.get_decompressor(archive)
+                output = f"test_native_out{fmt.replace('.', '_')}.bin"
+                decomp.decompress_file(archive, output)
+
+                with open(output, "rb") as f:
+                    data = f.read()
+
+                if data == test_data:
+                    print_success(
+                        f"{fmt} L{level}: {format_size(original_size)} -> "
+                        f"{format_size(archive_size)} ({ratio:.1f}%, {comp_time:.2f}с)"
+                    )
+                else:
+                    print_error(f"{fmt} L{level}: Данные не совпадают")
+
+                os.remove(archive)
+                os.remove(output)
+            except Exception as e:
+                print_error(f"{fmt} L{level}: {e}")
+
+    os.remove(test_file)
+
+    # наследник без compress_block/decompress_block не создаётся
+    from archiver.my_compressors import NativeCompressor
+    from archiver.decompressors import NativeDecompressor
+
+    for base in (NativeCompressor, NativeDecompressor):
+        try:
+            type("Incomplete", (base,), {"MAGIC": b"XXX1"})()
+            print_error(f"{base.__name__}: наследник без блочного метода создан")
+        except TypeError:
+            print_success(f"{base.__name__}: блочный метод обязателен")
+
+
+def test_directory_archive():
+    print_test("Архив директории: потоковые tar-запись и распаковка")
+
+    source = Path("test_dir_src")
+    shutil.rmtree(source, ignore_errors=True)
+    (source / "nested" / "deep").mkdir(parents=True)
+    files = {
+        "a.txt": b"alpha\n" * 1000,
+        "empty.bin": b"",
+        "nested/b.bin": bytes(range(256)) * 64,
+        "nested/deep/c.txt": "Привет, мир!\n".encode() * 500,
+        # крупнее PREFETCH_MAX_SIZE: читается потоком, а не упреждающе
+        "nested/big.bin": os.urandom(300 * 1024),
+    }
+
+    for name, content in files.items():
+        (source / name).write_bytes(content)
+
+    for fmt, opts in [(".zst", {}), (".bz2", {"threads": 2}), (".lzh", {})]:
+        archive = Path(f"test_dir{fmt}")
+        output = Path(f"test_dir_out{fmt.replace('.', '_')}")
+        try:
+            comp = ArchiveFactory.get_compressor(archive, level=3, **opts)
+            comp.compress(source, archive)
+
+            # промежуточного .tar рядом с архивом быть не должно
+            staged = archive.with_suffix(".tar").exists()
+
+            # tar распаковывается прямо из потока, без промежуточного .tmp
+            decomp = ArchiveFactory.get_decompressor(archive, **opts)
+            decomp.decompress(archive, output)
+
+            mismatched = [
+                name
+                for name, content in files.items()
+                if (output / source.name / name).read_bytes() != content
+            ]
+
+            if not mismatched and not staged:
+                print_success(
+                    f"{fmt}: {len(files)} файлов -> {format_size(archive.stat().st_size)}"
+                )
+            else:
+                print_error(f"{fmt}: Расхождения {mismatched}, .tar на диске: {staged}")
+
+        except Exception as e:
+            print_error(f"{fmt}: {e}")
+
+        finally:
+            if archive.exists():
+                archive.unlink()
+            shutil.rmtree(output, ignore_errors=True)
+
+    shutil.rmtree(source, ignore_errors=True)
+
+    # tar пустой директории - только нулевые блоки конца архива
+    source.mkdir()
+
+    for fmt in [".zst", ".bz2", ".lzh"]:
+        archive = Path(f"test_dir_empty{fmt}")
+        output = Path("test_dir_empty_out")
+        try:
+            ArchiveFactory.get_compressor(archive, level=3).compress(source, archive)
+            ArchiveFactory.get_decompressor(archive).decompress(archive, output)
+
+            if output.is_dir() and not any(output.iterdir()):
+                print_success(f"{fmt}: пустая директория восстановлена")
+            else:
+                print_error(f"{fmt}: пустая директория не восстановлена")
+
+        except Exception as e:
+            print_error(f"{fmt}: пустая директория: {e}")
+
+        finally:
+            if archive.exists():
+                archive.unlink()
+            if output.is_dir():
+                shutil.rmtree(output)
+            elif output.exists():
+                output.unlink()
+
+    shutil.rmtree(source, ignore_errors=True)
+
+    # файл, начинающийся с нулевых блоков (образ диска, разреженный файл),
+    # остаётся файлом
+    padded = Path("test_dir_zeros.img")
+    payloads = {
+        "нули и данные": bytes(4096) + b"payload" * 1000,
+        "только нули": bytes(64 * 1024),
+    }
+
+    for fmt in [".zst", ".bz2", ".lzh"]:
+        archive = Path(f"test_dir_zeros{fmt}")
+        output = Path("test_dir_zeros_out")
+
+        for label, content in payloads.items():
+            padded.write_bytes(content)
+            try:
+                ArchiveFactory.get_compressor(archive, level=3).compress(padded, archive)
+                ArchiveFactory.get_decompressor(archive).decompress(archive, output)
+
+                if output.is_file() and output.read_bytes() == content:
+                    print_success(f"{fmt}: {label} - файл восстановлен")
+                else:
+                    print_error(f"{fmt}: {label} - файл не восстановлен")
+
+            except Exception as e:
+                print_error(f"{fmt}: {label}: {e}")
+
+            finally:
+                if archive.exists():
+                    archive.unlink()
+                if output.is_dir():
+                    shutil.rmtree(output)
+                elif output.exists():
+                    output.unlink()
+
+    padded.unlink()
+
+
+def test_directory_manifest():
+    print_test("Манифест директории: один обход, размеры и имена")
+
+    source = Path("test_manifest_src")
+    shutil.rmtree(source, ignore_errors=True)
+    (source / "b" / "c").mkdir(parents=True)
+    (source / "empty_dir").mkdir()
+    sizes = {"a.txt": 10, "b/x.bin": 300, "b/c/y.bin": 4096}
+
+    for name, size in sizes.items():
+        (source / name).write_bytes(b"m" * size)
+
+    try:
+        from archiver.utils.manifest import DirectoryManifest
+
+        manifest = DirectoryManifest.scan(source)
+        names = sorted(entry.arcname for entry in manifest)
+        expected = sorted(f"{source.name}/{name}" for name in sizes)
+
+        if names == expected and manifest.total_size == sum(sizes.values()):
+            print_success(
+                f"{len(manifest)} файлов, {format_size(manifest.total_size)}"
+            )
+        else:
+            print_error(f"Манифест: {names}, {manifest.total_size} байт")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        shutil.rmtree(source, ignore_errors=True)
+
+
+def test_directory_dedupe():
+    print_test("Дедупликация одинаковых файлов директории")
+
+    source = Path("test_dedupe_src")
+    output = Path("test_dedupe_out")
+    archive = Path("test_dedupe.zst")
+    shutil.rmtree(source, ignore_errors=True)
+    (source / "vendor" / "lib").mkdir(parents=True)
+    shared = os.urandom(50 * 1024)
+    files = {
+        "a.bin": shared,
+        "vendor/a.bin": shared,
+        "vendor/lib/a.bin": shared,
+        "other.bin": os.urandom(50 * 1024),
+    }
+
+    for name, content in files.items():
+        (source / name).write_bytes(content)
+
+    try:
+        from archiver.utils.manifest import DirectoryManifest
+
+        manifest = DirectoryManifest.scan(source, dedupe=True)
+        comp = ArchiveFactory.get_compressor(archive, level=3)
+        comp.compress(source, archive, manifest=manifest)
+        ArchiveFactory.get_decompressor(archive).decompress(archive, output)
+
+        restored = {
+            name: (output / source.name / name).read_bytes() for name in files
+        }
+        # копии восстановлены отдельными файлами, а не общим inode
+        (output / source.name / "a.bin").write_bytes(b"changed")
+        independent = (output / source.name / "vendor" / "a.bin").read_bytes() == shared
+
+        if restored == files and len(manifest.duplicates) == 2 and independent:
+            print_success(
+                f"{len(manifest.duplicates)} дубликата, архив "
+                f"{format_size(archive.stat().st_size)}"
+            )
+        else:
+            print_error(
+                f"Дубликатов {len(manifest.duplicates)}, "
+                f"совпадение {restored == files}, независимы {independent}"
+            )
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        if archive.exists():
+            archive.unlink()
+        shutil.rmtree(source, ignore_errors=True)
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def test_hardlink_mode():
+    print_test("Права восстановленной жёсткой ссылки")
+
+    tar_path = Path("test_hardlink.tar")
+    archive = Path("test_hardlink.zst")
+    output = Path("test_hardlink_out")
+    content = os.urandom(10 * 1024)
+
+    try:
+        import tarfile
+
+        with tarfile.open(tar_path, "w") as tar:
+            info = tarfile.TarInfo("d/a.bin")
+            info.size = len(content)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(content))
+
+            link = tarfile.TarInfo("d/b.bin")
+            link.type = tarfile.LNKTYPE
+            link.linkname = "d/a.bin"
+            link.mode = 0o6777
+            tar.addfile(link)
+
+        ArchiveFactory.get_compressor(archive, level=3).compress(tar_path, archive)
+        ArchiveFactory.get_decompressor(archive).decompress(archive, output)
+
+        restored = output / "d" / "b.bin"
+        mode = restored.stat().st_mode & 0o7777
+
+        # setuid/setgid/sticky и запись для группы и остальных отброшены,
+        # как фильтр "data" делает для обычных файлов
+        if restored.read_bytes() == content and not mode & 0o7022:
+            print_success(f"Права копии {oct(mode)}")
+        else:
+            print_error(f"Права копии {oct(mode)}")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        for path in (tar_path, archive):
+            if path.exists():
+                path.unlink()
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def test_parallel_compression():
+    print_test("Многопоточное сжатие независимыми блоками")
+
+    test_file = "test_parallel.bin"
+    chunks = []
+    for i in range(2000):
+        chunks.append(f"Record {i}: " + "payload " * 20 + "\n")
+    test_data = "".join(chunks).encode()
+
+    with open(test_file, "wb") as f:
+        f.write(test_data)
+
+    original_size = len(test_data)
+
+    for fmt in [".zst", ".bz2"]:
+        archive = f"test_parallel{fmt}"
+        try:
+            comp = ArchiveFactory.get_compressor(archive, level=1, threads=4)
+
+            if fmt == ".zst":
+                comp.frame_size = 64 * 1024
+            start = time.time()
+            comp.compress_file(test_file, archive)
+            comp_time = time.time() - start
+
+            archive_size = os.path.getsize(archive)
+            ratio = (1 - archive_size / original_size) * 100
+
+            # результат должен читаться обычным распаковщиком
+            decomp = ArchiveFactory.get_decompressor(archive, implementation="stdlib")
+            output = f"test_parallel_out{fmt.replace('.', '_')}.bin"
+            decomp.decompress_file(archive, output)
+
+            with open(output, "rb") as f:
+                data = f.read()
+
+            if data == test_data:
+                print_success(
+                    f"{fmt}: {format_size(original_size)} -> {format_size(archive_size)} "
+                    f"({ratio:.1f}%, {comp_time*1000:.0f}мс, 4 потока)"
+                )
+            else:
+                print_error(f"{fmt}: Данные не совпадают")
+
+            os.remove(archive)
+            os.remove(output)
+        except Exception as e:
+            print_error(f"{fmt}: {e}")
+
+    os.remove(test_file)
+
+
+def test_parallel_decompression():
+    print_test("Многопоточная распаковка по кадрам и потокам")
+
+    test_file = "test_parallel_dec.bin"
+    test_data = b"".join(
+        f"Line {i}: ".encode() + bytes([i % 251]) * (i % 97) + b"\n"
+        for i in range(20000)
+    )
+
+    with open(test_file, "wb") as f:
+        f.write(test_data)
+
+    for fmt in [".zst", ".bz2"]:
+        archive = f"test_parallel_dec{fmt}"
+        comp = ArchiveFactory.get_compressor(archive, level=1, threads=2)
+
+        if fmt == ".zst":
+            comp.frame_size = 64 * 1024
+        comp.compress_file(test_file, archive)
+
+        for impl in ["custom", "stdlib"]:
+            output = f"test_parallel_dec_out{fmt.replace('.', '_')}_{impl}.bin"
+            try:
+                decomp = ArchiveFactory.get_decompressor(
+                    archive, implementation=impl, threads=4
+                )
+                # каждый кадр - отдельная задача, чтобы пул реально работал
+                decomp.SEGMENT_MIN_SIZE = 0
+                start = time.time()
+                decomp.decompress_file(archive, output)
+                dec_time = time.time() - start
+
+                with open(output, "rb") as f:
+                    data = f.read()
+
+                if data == test_data:
+                    print_success(
+                        f"{fmt} ({impl}): {format_size(len(test_data))} "
+                        f"за {dec_time*1000:.0f}мс, 4 потока"
+                    )
+                else:
+                    print_error(f"{fmt} ({impl}): Данные не совпадают")
+
+            except Exception as e:
+                print_error(f"{fmt} ({impl}): {e}")
+
+            finally:
+                if os.path.exists(output):
+                    os.remove(output)
+
+        os.remove(archive)
+
+    os.remove(test_file)
+
+
+def test_seekable_zstd():
+    print_test("Seekable .zst: чтение диапазона по таблице поиска")
+
+    test_file = "test_seekable.bin"
+    archive = "test_seekable.zst"
+    test_data = b"".join(f"{i:08d}|".encode() * (i % 13 + 1) for i in range(30000))
+
+    with open(test_file, "wb") as f:
+        f.write(test_data)
+
+    try:
+        comp = ArchiveFactory.get_compressor(
+            archive, level=3, seekable=True, frame_size=64 * 1024
+        )
+        comp.compress_file(test_file, archive)
+
+        ranges = [
+            (0, 10),
+            (64 * 1024 - 5, 10),
+            (len(test_data) // 2, 200 * 1024),
+            (len(test_data) - 7, 100),
+            (len(test_data) + 1, 10),
+        ]
+
+        for impl in ["custom", "stdlib"]:
+            decomp = ArchiveFactory.get_decompressor(archive, implementation=impl)
+            bad = [
+                (offset, length)
+                for offset, length in ranges
+                if decomp.read_range(archive, offset, length)
+                != test_data[offset : offset + length]
+            ]
+
+            output = f"test_seekable_out_{impl}.bin"
+            decomp.decompress_file(archive, output)
+
+            with open(output, "rb") as f:
+                full_ok = f.read() == test_data
+            os.remove(output)
+
+            if not bad and full_ok:
+                print_success(
+                    f"{impl}: {len(ranges)} диапазонов и полная распаковка совпадают"
+                )
+            else:
+                print_error(f"{impl}: Неверные диапазоны {bad}, полная: {full_ok}")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        for path in [test_file, archive]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_indexed_archive():
+    print_test("Индексированный .zst: список и распаковка одного файла")
+
+    source = Path("test_indexed_src")
+    archives = [Path("test_indexed.zst"), Path("test_indexed_plain.zst")]
+    output = Path("test_indexed_out")
+    shutil.rmtree(source, ignore_errors=True)
+    (source / "docs").mkdir(parents=True)
+    shared = os.urandom(20 * 1024)
+    files = {
+        "big.bin": os.urandom(300 * 1024),
+        "docs/a.txt": b"alpha " * 5000,
+        "docs/b.txt": shared,
+        "copy.bin": shared,
+    }
+
+    for name, content in files.items():
+        (source / name).write_bytes(content)
+
+    try:
+        from archiver.utils.manifest import DirectoryManifest
+
+        manifest = DirectoryManifest.scan(source, dedupe=True)
+        ArchiveFactory.get_compressor(
+            archives[0], level=3, indexed=True, frame_size=64 * 1024
+        ).compress(source, archives[0], manifest=manifest)
+        ArchiveFactory.get_compressor(archives[1], level=3).compress(
+            source, archives[1]
+        )
+
+        expected = sorted(f"{source.name}/{name}" for name in files)
+
+        for archive in archives:
+            for impl in ["custom", "stdlib"]:
+                decomp = ArchiveFactory.get_decompressor(archive, implementation=impl)
+                names = sorted(m.name for m in decomp.list_members(archive))
+
+                shutil.rmtree(output, ignore_errors=True)
+                decomp.extract_member(archive, f"{source.name}/copy.bin", output)
+                decomp.extract_member(archive, f"{source.name}/docs", output)
+                restored = {
+                    name: (output / source.name / name).read_bytes()
+                    for name in files
+                    if name != "big.bin"
+                }
+                skipped = not (output / source.name / "big.bin").exists()
+
+                try:
+                    decomp.extract_member(archive, "missing", output)
+                    missing = False
+                except ValueError:
+                    missing = True
+
+                expected_files = {k: v for k, v in files.items() if k != "big.bin"}
+
+                if (
+                    names == expected
+                    and restored == expected_files
+                    and skipped
+                    and missing
+                ):
+                    print_success(f"{archive.name} ({impl}): {len(names)} файла")
+                else:
+                    print_error(
+                        f"{archive.name} ({impl}): список {names == expected}, "
+                        f"файлы {restored == expected_files}, лишнее {not skipped}"
+                    )
+
+        shutil.rmtree(output, ignore_errors=True)
+        decomp = ArchiveFactory.get_decompressor(archives[0], threads=2)
+        decomp.decompress(archives[0], output)
+        full = {name: (output / source.name / name).read_bytes() for name in files}
+
+        if full == files:
+            print_success("Полная распаковка индексированного архива")
+        else:
+            print_error("Полная распаковка индексированного архива не совпадает")
+
+        # файл исчез после обхода: неполный архив без индекса не остаётся
+        (source / "docs" / "a.txt").unlink()
+
+        try:
+            ArchiveFactory.get_compressor(archives[0], level=3, indexed=True).compress(
+                source, archives[0], manifest=manifest
+            )
+            print_error("Сжатие с исчезнувшим файлом не завершилось ошибкой")
+        except RuntimeError:
+            if archives[0].exists():
+                print_error("Неполный индексированный архив остался на диске")
+            else:
+                print_success("Неполный индексированный архив удалён")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        for archive in archives:
+            if archive.exists():
+                archive.unlink()
+        shutil.rmtree(source, ignore_errors=True)
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def test_format_detection():
+    print_test("Определение формата по сигнатуре")
+
+    test_data = b"signature test " * 2000
+    source = Path("test_detect_src.bin")
+    renamed = Path("test_detect.dat")
+    output = Path("test_detect_out.bin")
+    source.write_bytes(test_data)
+
+    try:
+        for ext in [".zst", ".bz2", ".lzh", ".bwh"]:
+            archive = Path(f"test_detect{ext}")
+            ArchiveFactory.get_compressor(archive, level=3).compress(source, archive)
+            archive.replace(renamed)
+
+            decomp = ArchiveFactory.get_decompressor(renamed)
+            decomp.decompress_file(renamed, output)
+            file_ok = output.read_bytes() == test_data
+
+            # открытый файл: первые байты читаются без сдвига позиции
+            with open(renamed, "rb") as f:
+                detected = ArchiveFactory.detect_format(f)
+                position = f.tell()
+                f.read(100)
+                cached = ArchiveFactory.detect_format(f)
+
+            buffer = io.BytesIO(renamed.read_bytes())
+            buffer_ok = ArchiveFactory.detect_format(buffer) == ext
+
+            if (
+                decomp.get_extension() == ext
+                and file_ok
+                and detected == cached == ext
+                and position == 0
+                and buffer_ok
+            ):
+                print_success(f"{ext}: распознан без расширения")
+            else:
+                print_error(
+                    f"{ext}: выбран {decomp.get_extension()}, данные {file_ok}, "
+                    f"handle {detected}/{cached} (позиция {position}), "
+                    f"BytesIO {buffer_ok}"
+                )
+
+        try:
+            ArchiveFactory.get_decompressor(io.BytesIO(b"not an archive"))
+            print_error("Неизвестные данные без имени приняты")
+        except ValueError:
+            print_success("Неизвестные данные без имени отклонены")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        for path in [source, renamed, output]:
+            if path.exists():
+                path.unlink()
+
+
+def test_auto_codec():
+    print_test("Автовыбор формата и уровня по выборке")
+
+    from archiver.selection import CodecChoice, pick_codec
+
+    results = [
+        CodecChoice(".zst", 1, 60.0, 500.0),
+        CodecChoice(".zst", 9, 64.0, 60.0),
+        CodecChoice(".bz2", 9, 70.0, 8.0),
+    ]
+    picks = [
+        pick_codec(results, min_speed=50),
+        pick_codec(results, min_ratio=62),
+        pick_codec(results, min_speed=1000),
+        pick_codec(results, min_ratio=90),
+        pick_codec(results),
+    ]
+    expected = [results[1], results[1], results[0], results[2], results[2]]
+
+    if picks == expected:
+        print_success("Цели скорости и степени сжатия выбирают ожидаемых кандидатов")
+    else:
+        print_error(f"Выбрано {[(p.extension, p.level) for p in picks]}")
+
+    test_file = Path("test_auto.bin")
+    archive = None
+    test_data = "".join(f"запись {i}: значение {i * 7 % 1000}\n" for i in range(50000))
+    test_file.write_bytes(test_data.encode("utf-8"))
+
+    try:
+        choice = ArchiveFactory.choose_codec(test_file, min_speed=1)
+        fast = ArchiveFactory.choose_codec(test_file, min_speed=1e9)
+        comp = ArchiveFactory.get_auto_compressor(test_file, min_ratio=50)
+        archive = Path(f"test_auto{comp.extension}")
+        comp.compress_file(test_file, archive)
+
+        output = Path("test_auto_out.bin")
+        ArchiveFactory.get_decompressor(archive).decompress_file(archive, output)
+        restored = output.read_bytes() == test_file.read_bytes()
+        output.unlink()
+
+        try:
+            ArchiveFactory.choose_codec(test_file, min_speed=1, min_ratio=1)
+            both_rejected = False
+        except ValueError:
+            both_rejected = True
+
+        # параметры только zstd сужают выбор до .zst, а threads у stdlib
+        # есть только у bz2
+        indexed = ArchiveFactory.get_auto_compressor(
+            test_file, min_ratio=99, indexed=True
+        )
+        threaded = ArchiveFactory.choose_codec(
+            test_file, min_ratio=99, implementation="stdlib", threads=2
+        )
+        options_kept = indexed.extension == ".zst" and threaded.extension == ".bz2"
+
+        if (
+            choice.ratio > 50
+            and fast.speed > 0
+            and restored
+            and both_rejected
+            and options_kept
+        ):
+            print_success(
+                f"Выбрано {choice.extension} -{choice.level}: "
+                f"{choice.ratio:.1f}%, {choice.speed:.0f} МБ/с"
+            )
+        else:
+            print_error(
+                f"Выбор {choice}, быстрейший {fast}, восстановлено {restored}, "
+                f"две цели отклонены {both_rejected}, параметры учтены {options_kept}"
+            )
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        for path in [test_file, archive]:
+            if path and path.exists():
+                path.unlink()
+
+
+def test_batch_mode():
+    print_test("Пакетный режим: много файлов в пуле процессов")
+
+    from archiver.batch import (
+        compress_job,
+        decompress_job,
+        expand_sources,
+        plan_outputs,
+        run_batch,
+    )
+
+    source = Path("test_batch_src")
+    shutil.rmtree(source, ignore_errors=True)
+    (source / "nested").mkdir(parents=True)
+    files = {}
+
+    for i in range(6):
+        name = source / ("nested" if i % 2 else "") / f"app{i}.log"
+        files[name] = "".join(f"{i}: строка журнала {j}\n" for j in range(3000)).encode()
+        name.write_bytes(files[name])
+
+    list_file = Path("test_batch_list.txt")
+    list_file.write_text(f"{source}/app0.log\nmissing.log\n", encoding="utf-8")
+
+    try:
+        sources = expand_sources([f"{source}/**/*.log"], str(list_file))
+        expected = sorted(files) + [Path("missing.log")]
+
+        if sorted(sources[:-1]) == sorted(files) and sources[-1] == expected[-1]:
+            print_success(f"Шаблон ** и список: {len(sources)} путей без повторов")
+        else:
+            print_error(f"Пути: {sources}")
+
+        for workers in [1, 2]:
+            tasks = [(path, Path(f"{path}.zst"), 3, "custom") for path in sources]
+            results = list(run_batch(compress_job, tasks, workers))
+            failed = [r.source for r in results if r.error]
+
+            back = [(Path(f"{path}.zst"), Path(f"{path}.out"), "custom") for path in files]
+            restored = list(run_batch(decompress_job, back, workers))
+            same = all(Path(f"{path}.out").read_bytes() == data for path, data in files.items())
+
+            if failed == ["missing.log"] and same and not any(r.error for r in restored):
+                print_success(
+                    f"{workers} процесс(а): {len(files)} файлов сжато и распаковано, "
+                    f"ошибка отдельного файла не прерывает пакет"
+                )
+            else:
+                print_error(f"{workers} процесс(а): ошибки {failed}, совпадение {same}")
+
+        # одноимённые файлы из разных директорий в одной output_dir
+        (source / "app0.log").write_bytes(b"top")
+        (source / "nested" / "app0.log").write_bytes(b"nested")
+        same_name = [source / "app0.log", source / "nested" / "app0.log"]
+        planned, conflicts = plan_outputs(
+            same_name, lambda path: Path(f"{path}.zst"), "test_batch_out"
+        )
+        tasks = [(src, out, 3, "custom") for src, out in planned]
+        results = list(run_batch(compress_job, tasks, 2))
+        back = [(out, Path(f"{src}.back"), "custom") for src, out in planned]
+        list(run_batch(decompress_job, back, 2))
+        kept = [Path(f"{src}.back").read_bytes() for src in same_name]
+
+        # разные архивы с одним результатом распаковки - ошибка до запуска
+        _, clashes = plan_outputs(
+            [Path("x.zst"), Path("x.bz2")], lambda path: path.with_suffix(""), None
+        )
+        # повторный запуск по f.log и f.log.zst: сжатие f.log перезаписало
+        # бы архив, который в это же время читает другая задача
+        rerun, overlaps = plan_outputs(
+            [Path("f.log"), Path("f.log.zst")], lambda path: Path(f"{path}.zst")
+        )
+
+        if (
+            len(planned) == 2
+            and not conflicts
+            and not any(r.error for r in results)
+            and kept == [b"top", b"nested"]
+            and [r.source for r in clashes] == ["x.bz2"]
+            and not rerun
+            and [r.source for r in overlaps] == ["f.log", "f.log.zst"]
+        ):
+            print_success("Одноимённые файлы не перезаписывают друг друга")
+        else:
+            print_error(
+                f"Задачи {planned}, конфликты {conflicts}, восстановлено {kept}, "
+                f"совпадения выходов {clashes}, пересечения с исходными {overlaps}"
+            )
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        shutil.rmtree(source, ignore_errors=True)
+        shutil.rmtree("test_batch_out", ignore_errors=True)
+        if list_file.exists():
+            list_file.unlink()
+
+
+def test_async_api():
+    print_test("Асинхронный API: потоки asyncio и пути")
+
+    import asyncio
+
+    test_data = os.urandom(200 * 1024) + "".join(
+        f"запись {i}\n" for i in range(100000)
+    ).encode("utf-8")
+    test_file = Path("test_async.bin")
+    test_file.write_bytes(test_data)
+
+    def stream_of(data: bytes, piece: int = 65536):
+        reader = asyncio.StreamReader()
+        for i in range(0, len(data), piece):
+            reader.feed_data(data[i : i + piece])
+        reader.feed_eof()
+        return reader
+
+    async def roundtrip(ext):
+        comp = ArchiveFactory.get_compressor(f"test_async{ext}", level=3)
+        packed = io.BytesIO()
+        await comp.compress_stream_async(stream_of(test_data), packed)
+
+        decomp = ArchiveFactory.get_decompressor(io.BytesIO(packed.getvalue()))
+        restored = io.BytesIO()
+        await decomp.decompress_stream_async(stream_of(packed.getvalue()), restored)
+        return restored.getvalue() == test_data
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        results = {ext: await roundtrip(ext) for ext in [".zst", ".bz2", ".lzh"]}
+
+        comp = ArchiveFactory.get_compressor("test_async.zst", level=9)
+        archives = [Path(f"test_async_{i}.zst") for i in range(4)]
+        await asyncio.gather(
+            *[comp.compress_async(test_file, archive) for archive in archives]
+        )
+        decomp = ArchiveFactory.get_decompressor(archives[0])
+        output = Path("test_async_out.bin")
+        await decomp.decompress_async(archives[0], output)
+        results["пути"] = output.read_bytes() == test_data
+
+        try:
+            truncated = io.BytesIO(archives[0].read_bytes()[:-10])
+            await decomp.decompress_stream_async(truncated, io.BytesIO())
+            results["обрезанный"] = False
+        except ValueError:
+            results["обрезанный"] = True
+
+        # файл в поток: прогресс знает размер входа
+        progress = []
+        packed = io.BytesIO()
+        await comp.compress_async(
+            test_file, packed, lambda done, total: progress.append((done, total))
+        )
+        results["прогресс"] = progress[-1] == (len(test_data), len(test_data))
+
+        try:
+            await decomp.decompress_async(io.BytesIO(packed.getvalue()))
+            results["поток без destination"] = False
+        except ValueError:
+            results["поток без destination"] = True
+
+        ticking.cancel()
+        for path in archives + [output]:
+            path.unlink()
+
+        return results, ticks
+
+    try:
+        results, ticks = asyncio.run(run())
+
+        if all(results.values()) and ticks > 0:
+            print_success(
+                f"{', '.join(results)}: совпадают, цикл событий не блокировался "
+                f"({ticks} тактов таймера)"
+            )
+        else:
+            print_error(f"Результаты {results}, тактов таймера {ticks}")
+
+    except Exception as e:
+        print_error(f"Ошибка: {e}")
+
+    finally:
+        if test_file.exists():
+            test_file.unlink()
+
+
 def main():
     print_header("РАСШИРЕННОЕ ТЕСТИРОВАНИЕ АРХИВАТОРА")
     print(f"Python версия: {sys.version.split()[0]}")
@@ -473,9 +1458,16 @@ def main():
             [
                 test_repetitive_data,
                 test_random_data,
+                test_incompressible_blocks,
                 test_mixed_content,
                 test_unicode_text,
                 test_all_bytes,
+                test_native_formats,
+                test_format_detection,
+                test_directory_archive,
+                test_directory_manifest,
+                test_directory_dedupe,
+                test_hardlink_mode,
             ],
         ),
         (
@@ -483,6 +1475,13 @@ def main():
             [
                 test_large_file,
                 test_compression_levels,
+                test_auto_codec,
+                test_parallel_compression,
+                test_parallel_decompression,
+                test_seekable_zstd,
+                test_indexed_archive,
+                test_batch_mode,
+                test_async_api,
             ],
         ),
     ]
@@ -4,8 +4,18 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from archiver.algorithms.huffman import HuffmanEncoder, HuffmanDecoder
-from archiver.algorithms.lz77 import LZ77Compressor, LZ77Decompressor
+from archiver.algorithms.huffman import (
+    HuffmanDecoder,
+    HuffmanEncoder,
+    compress_with_huffman,
+    decompress_with_huffman,
+)
+from archiver.algorithms.lz77 import (
+    LZ77Compressor,
+    LZ77Decompressor,
+    LZ77Tokens,
+    write_varint,
+)
 from archiver.algorithms.bwt import BWT
 from archiver.algorithms.mtf import MTF
 from archiver.algorithms.rle import RLE
@@ -31,6 +41,52 @@ def test_huffman():
     return False
 
 
+def test_huffman_long_codes():
+    print("\n>>> Huffman с длинными кодами (частоты Фибоначчи)")
+
+    freqs = [1, 1]
+    while len(freqs) < 20:
+        freqs.append(freqs[-1] + freqs[-2])
+    data = b"".join(bytes([i]) * f for i, f in enumerate(freqs))
+    print(f"  {len(data)} байт")
+
+    encoder = HuffmanEncoder()
+    encoded, metadata = encoder.encode(data)
+    decoded = HuffmanDecoder().decode(encoded, metadata)
+
+    if bytes(decoded) == data:
+        print("  OK: работает")
+        return True
+    print("  FAIL: не совпадает")
+    return False
+
+
+def test_huffman_truncated():
+    print("\n>>> Huffman на обрезанном заголовке")
+
+    data = bytes(range(256)) + b"abracadabra " * 50
+    packed = compress_with_huffman(data)
+    ok = decompress_with_huffman(packed) == data
+
+    # размер, битовая карта и полубайты длин обрезаны в разных местах
+    for cut in [0, 3, 20, 38, 40, 100]:
+        try:
+            decompress_with_huffman(packed[:cut])
+            print(f"  {cut} байт: ошибка не обнаружена")
+            ok = False
+        except ValueError:
+            pass
+        except Exception as e:
+            print(f"  {cut} байт: {type(e).__name__} вместо ValueError")
+            ok = False
+
+    if ok:
+        print("  OK: работает")
+        return True
+    print("  FAIL: не совпадает")
+    return False
+
+
 def test_lz77():
     print("\n>>> LZ77 компрессия")
     
@@ -50,6 +106,81 @@ def test_lz77():
     return False
 
 
+def test_lz77_repetitive():
+    print("\n>>> LZ77 на вырожденных повторах")
+
+    import time
+
+    data = b"AAAA" * 50000
+    print(f"  {len(data)} байт")
+
+    start = time.time()
+    compressed = LZ77Compressor().compress(data)
+    print(f"  {len(compressed)} элементов за {time.time() - start:.2f} с")
+
+    decompressed = LZ77Decompressor.decompress(compressed)
+
+    if decompressed == data:
+        print("  OK: работает")
+        return True
+    print("  FAIL: не совпадает")
+    return False
+
+
+def test_lz77_levels():
+    print("\n>>> LZ77 уровни сжатия (greedy, lazy, optimal)")
+
+    data = b"the quick brown fox jumps over the lazy dog; " * 40 + bytes(range(256))
+    ok = True
+
+    for level in [1, 5, 9]:
+        compressor = LZ77Compressor(level=level)
+        compressed = compressor.compress(data)
+        print(f"  уровень {level} ({compressor.strategy}): {len(compressed)} элементов")
+
+        if LZ77Decompressor.decompress(compressed) != data:
+            ok = False
+
+    if ok:
+        print("  OK: работает")
+        return True
+    print("  FAIL: не совпадает")
+    return False
+
+
+def test_lz77_corrupt():
+    print("\n>>> LZ77 на повреждённых токенах")
+
+    def tokens(offset, length):
+        lengths = bytearray()
+        offsets = bytearray()
+        write_varint(lengths, 3)
+        write_varint(lengths, length - LZ77Tokens.MIN_MATCH)
+        write_varint(offsets, offset)
+        return LZ77Tokens(bytearray(b"abc"), lengths, offsets, match_count=1)
+
+    cases = {
+        "смещение 0": (tokens(0, 5), None),
+        "смещение за началом": (tokens(10, 5), None),
+        "длина больше блока": (tokens(1, 1 << 40), 1024),
+    }
+    ok = True
+
+    for name, (corrupt, max_size) in cases.items():
+        try:
+            LZ77Decompressor.decompress(corrupt, max_size)
+            print(f"  {name}: ошибка не обнаружена")
+            ok = False
+        except ValueError:
+            pass
+
+    if ok:
+        print("  OK: работает")
+        return True
+    print("  FAIL: не совпадает")
+    return False
+
+
 def test_bwt():
     print("\n>>> BWT (Burrows-Wheeler)")
     
@@ -66,6 +197,28 @@ def test_bwt():
     return False
 
 
+def test_bwt_large():
+    print("\n>>> BWT на большом блоке")
+
+    import time
+
+    text = b"Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    data = (text * 5000)[: 256 * 1024]
+    print(f"  {len(data)} байт")
+
+    start = time.time()
+    transformed, idx = BWT.transform(data)
+    print(f"  прямое преобразование за {time.time() - start:.2f} с")
+
+    restored = BWT.inverse_transform(transformed, idx)
+
+    if restored == data:
+        print("  OK: работает")
+        return True
+    print("  FAIL: не совпадает")
+    return False
+
+
 def test_mtf():
     print("\n>>> MTF (Move-to-Front)")
     
@@ -132,8 +285,6 @@ def test_bz2_pipeline():
 def test_zstd_pipeline():
     print("\n>>> ZSTD пайплайн (LZ77->Huffman)")
     
-    import pickle
-    
     data = b"abracadabra " * 100
     print(f"  {len(data)} байт")
     
@@ -141,7 +292,7 @@ def test_zstd_pipeline():
     lz77 = LZ77Compressor(wnd_size=16384)
     lz77_out = lz77.compress(data)
     
-    lz77_bytes = pickle.dumps(lz77_out)
+    lz77_bytes = lz77_out.to_bytes()
     encoder = HuffmanEncoder()
     final, meta = encoder.encode(lz77_bytes)
     print(f"  сжато до {len(final)} байт ({len(data) / len(final):.1f}x)")
@@ -149,7 +300,7 @@ def test_zstd_pipeline():
     
     decoder = HuffmanDecoder()
     lz77_bytes_back = decoder.decode(final, meta)
-    lz77_back = pickle.loads(bytes(lz77_bytes_back))
+    lz77_back = LZ77Tokens.from_bytes(lz77_bytes_back)
     result = LZ77Decompressor.decompress(lz77_back)
     
     if result == data:
@@ -166,8 +317,14 @@ def main():
     
     tests = {
         "Huffman": test_huffman(),
+        "Huffman длинные коды": test_huffman_long_codes(),
+        "Huffman обрезанный заголовок": test_huffman_truncated(),
         "LZ77": test_lz77(),
+        "LZ77 повторы": test_lz77_repetitive(),
+        "LZ77 уровни": test_lz77_levels(),
+        "LZ77 повреждения": test_lz77_corrupt(),
         "BWT": test_bwt(),
+        "BWT большой блок": test_bwt_large(),
         "MTF": test_mtf(),
         "RLE": test_rle(),
         "BZ2 полный": test_bz2_pipeline(),